@@ -0,0 +1,123 @@
+"""
+Chat response formatter
+Turns a Gemini chat reply into the layout the chat UI renders, for a whole
+response or incrementally while it streams.
+"""
+
+FENCE = '```'
+# The end of a **bold** span; its "* " is not a bullet
+BOLD_END = '** '
+
+
+def _fence_lines(text):
+    """Yield (start, end) of every line that opens or closes a ``` code block"""
+    position = text.find(FENCE)
+    while position >= 0:
+        line_start = text.rfind('\n', 0, position) + 1
+        line_end = text.find('\n', position)
+        if line_end < 0:
+            line_end = len(text)
+        if not text[line_start:position].strip():
+            yield line_start, line_end
+        position = text.find(FENCE, line_end)
+
+
+def _replace_bullets(text):
+    """Markdown bullets become "•"; "*•" leftovers are dropped"""
+    return text.replace('* ', '• ').replace('- ', '• ').replace('*•', '')
+
+
+class ChatFormatter:
+    """
+    Formats a chat response, whole or incrementally as chunks arrive.
+
+    Outside fenced code blocks every line is stripped, bullets are rewritten
+    and non-empty lines are separated by a blank line. Lines inside ``` fences
+    are kept as written apart from trailing whitespace; blank lines inside a
+    fence are dropped because the UI splits paragraphs on blank lines.
+
+    Each run of complete lines is rewritten with whole-text str operations
+    instead of per-line passes, and a stream keeps only its unfinished line.
+
+    Usage:
+        formatter = ChatFormatter()
+        for chunk in chunks:
+            send(formatter.feed(chunk))
+        send(formatter.finish())
+    """
+
+    def __init__(self):
+        self._pending = ''
+        self._in_code = False
+        self._started = False
+
+    def feed(self, chunk):
+        """Add a chunk and return the formatted text of every line it completed"""
+        end = chunk.rfind('\n')
+        if end < 0:
+            self._pending += chunk
+            return ''
+        text = self._pending + chunk[:end] if self._pending else chunk[:end]
+        self._pending = chunk[end + 1:]
+        return self._format_lines(text)
+
+    def finish(self):
+        """Format the last, unterminated line and reset the formatter"""
+        text = self._format_lines(self._pending)
+        self._pending = ''
+        self._in_code = False
+        self._started = False
+        return text
+
+    def format(self, text):
+        """Format a complete response"""
+        self._pending = text
+        return self.finish()
+
+    def _format_lines(self, text):
+        parts = []
+        position = 0
+        for start, end in _fence_lines(text):
+            self._add_segment(parts, text[position:start])
+            # Code lines follow their opening fence directly
+            self._add(parts, text[start:end].strip(), '\n' if self._in_code else '\n\n')
+            self._in_code = not self._in_code
+            position = end
+        self._add_segment(parts, text[position:] if position else text)
+        return ''.join(parts)
+
+    def _add_segment(self, parts, segment):
+        """Add lines that are all inside or all outside a code block"""
+        if self._in_code:
+            lines = map(str.rstrip, segment.split('\n'))
+            self._add(parts, '\n'.join(filter(None, lines)), '\n')
+            return
+        if '* ' in segment or '- ' in segment or '*•' in segment:
+            segment = BOLD_END.join([_replace_bullets(part) for part in segment.split(BOLD_END)])
+        lines = map(str.strip, segment.split('\n'))
+        self._add(parts, '\n\n'.join(filter(None, lines)), '\n\n')
+
+    def _add(self, parts, text, separator):
+        if not text:
+            return
+        if self._started:
+            parts.append(separator)
+        self._started = True
+        parts.append(text)
+
+
+def format_chat_response(text):
+    """Format a complete chat response"""
+    return ChatFormatter().format(text)
+
+
+async def format_chat_stream(chunks):
+    """Format an async stream of response chunks, yielding each line once it is complete"""
+    formatter = ChatFormatter()
+    async for chunk in chunks:
+        text = formatter.feed(chunk)
+        if text:
+            yield text
+    text = formatter.finish()
+    if text:
+        yield text
@@ -1,11 +1,30 @@
 import os
-from fastapi import FastAPI
+import sys
+import asyncio
+import json
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Optional
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import Response, StreamingResponse
 from pydantic import BaseModel
 import google.generativeai as genai
 from dotenv import load_dotenv
 import re
-from difflib import SequenceMatcher
+from chat_formatter import format_chat_response, format_chat_stream
+from prompts import CHAT_PROMPT, CODE_PROMPT, estimate_tokens
+
+# Shared modules (llm_common/) live at the repository root; this is the
+# backend's only entry point, so the path is set up here
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+from llm_common import metrics
+from llm_common.code_fence import FenceScanner, extract_code
+from llm_common.generation import CODE_STOP_SEQUENCES, output_token_budget, stop_cut_before_code
 
 load_dotenv()
 
@@ -22,27 +41,498 @@ app.add_middleware(
 
 # Initialize Gemini client
 genai.configure(api_key=os.environ["GEMINI_API_KEY"])
-model = genai.GenerativeModel('gemini-2.5-flash')
+GEMINI_MODEL = 'gemini-2.5-flash'
+# One model per prompt template, carrying its fixed instructions
+model = CODE_PROMPT.build_model(GEMINI_MODEL)
+chat_model = CHAT_PROMPT.build_model(GEMINI_MODEL)
+
+# Service label for the shared metrics (see GET /metrics)
+SERVICE = "chatbot"
+HTTP_LATENCY = metrics.histogram(
+    "http_request_seconds", "Chatbot API response time (to the first byte for streams)",
+    ("method", "path", "status"))
+# Per-request prompt size by template; "cached" counts the prompt tokens
+# Gemini served from its implicit context cache (the shared system prefix)
+TEMPLATE_PROMPT_TOKENS = metrics.histogram(
+    "prompt_template_tokens", "Prompt tokens per Gemini call by prompt template",
+    ("template", "kind"), metrics.TOKEN_BUCKETS)
+
+@app.middleware("http")
+async def record_request_time(request: Request, call_next):
+    start = time.perf_counter()
+    response = await call_next(request)
+    route = request.scope.get("route")
+    # Label by route template so unknown paths don't create new series
+    path = route.path if route is not None else "unmatched"
+    HTTP_LATENCY.observe(time.perf_counter() - start, method=request.method,
+                         path=path, status=response.status_code)
+    return response
+
+# Gemini calls are blocking, so they run on a bounded thread pool instead of
+# the event loop. Requests beyond the limit queue for a free worker.
+GEMINI_MAX_CONCURRENCY = int(os.getenv("GEMINI_MAX_CONCURRENCY", "8"))
+generation_executor = ThreadPoolExecutor(
+    max_workers=GEMINI_MAX_CONCURRENCY,
+    thread_name_prefix="gemini",
+)
+
+# Upper bound on tokens per side used for the sequence-similarity component,
+# so scoring cost stays bounded for very large inputs
+CODEBLEU_MAX_TOKENS = int(os.getenv("CODEBLEU_MAX_TOKENS", "50000"))
+TOKEN_PATTERN = re.compile(r'\b\w+\b|[^\w\s]')
+
+# Identical /generate-code requests share one Gemini call while it is in
+# flight, and its result is reused for this many seconds afterwards (0 = off)
+GENERATION_CACHE_TTL = float(os.getenv("GENERATION_CACHE_TTL", "30"))
+GENERATION_CACHE_SIZE = 256
+
+# /generate-code output limits. Every call gets the cap unless
+# GEMINI_OUTPUT_BUDGETS=1, which sizes a budget from the query and language,
+# plus room for Gemini's thinking tokens (they count against it, and vary a
+# lot per request). A reply that runs out is requested again with the cap.
+GEMINI_MAX_OUTPUT_TOKENS = int(os.getenv("GEMINI_MAX_OUTPUT_TOKENS", "8192"))
+GEMINI_OUTPUT_BUDGETS = os.getenv("GEMINI_OUTPUT_BUDGETS", "0") == "1"
+GEMINI_THINKING_TOKENS = int(os.getenv("GEMINI_THINKING_TOKENS", "1024"))
+
+# /chat sessions: history kept per session is capped at roughly this many
+# tokens (oldest exchanges are dropped first); idle sessions expire after
+# CHAT_SESSION_TTL seconds and the least recently used go first beyond
+# CHAT_MAX_SESSIONS
+CHAT_HISTORY_TOKEN_BUDGET = int(os.getenv("CHAT_HISTORY_TOKEN_BUDGET", "8000"))
+CHAT_SESSION_TTL = float(os.getenv("CHAT_SESSION_TTL", "3600"))
+CHAT_MAX_SESSIONS = int(os.getenv("CHAT_MAX_SESSIONS", "1000"))
 
 class Message(BaseModel):
     message: str
+    stream: bool = False
+    session_id: Optional[str] = None
 
 class CodeGenerationRequest(BaseModel):
     query: str
     language: str = "python"
+    stream: bool = False
 
 class CodeValidationRequest(BaseModel):
     generated_code: str
     reference_code: str
     language: str = "python"
 
-def extract_code_block(text, language):
-    """Extract code from markdown code blocks"""
-    pattern = rf"```{language}\n(.*?)\n```"
-    match = re.search(pattern, text, re.DOTALL)
-    if match:
-        return match.group(1)
-    return text
+def extract_generated_code(text, language):
+    """Extract the code from a Gemini reply, recording how long it took"""
+    with metrics.CODE_EXTRACTION.time(service=SERVICE):
+        return extract_code(text, language)
+
+def record_usage(response, template):
+    """Record the token counts Gemini reports on a response (or last stream chunk)"""
+    usage = getattr(response, "usage_metadata", None)
+    if usage is not None:
+        prompt_tokens = getattr(usage, "prompt_token_count", None)
+        metrics.record_tokens(SERVICE, GEMINI_MODEL, prompt_tokens,
+                              getattr(usage, "candidates_token_count", None))
+        if prompt_tokens is not None:
+            TEMPLATE_PROMPT_TOKENS.observe(prompt_tokens, template=template.name, kind="prompt")
+            TEMPLATE_PROMPT_TOKENS.observe(getattr(usage, "cached_content_token_count", 0) or 0,
+                                           template=template.name, kind="cached")
+
+def call_gemini(template, func, *args, **kwargs):
+    """Make a blocking Gemini call, recording its latency, errors and token usage"""
+    with metrics.track_llm_call(SERVICE, GEMINI_MODEL):
+        response = func(*args, **kwargs)
+    record_usage(response, template)
+    return response
+
+async def run_generation(template, func, *args, **kwargs):
+    """Run a blocking Gemini call for a prompt template on the generation pool"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        generation_executor, partial(call_gemini, template, func, *args, **kwargs))
+
+async def generate_content(prompt, **kwargs):
+    """Run model.generate_content (the /generate-code template) on the generation pool"""
+    return await run_generation(CODE_PROMPT, model.generate_content, prompt, **kwargs)
+
+def code_generation_config(max_output_tokens, stop=True):
+    """Output limit for a /generate-code call; stop sequences end it at the closing fence"""
+    return genai.GenerationConfig(
+        max_output_tokens=max_output_tokens,
+        stop_sequences=list(CODE_STOP_SEQUENCES) if stop else None,
+    )
+
+def finished_at_limit(response):
+    """True if Gemini stopped because the reply ran out of output tokens"""
+    for candidate in getattr(response, "candidates", None) or []:
+        reason = getattr(candidate.finish_reason, "name", candidate.finish_reason)
+        if reason == "MAX_TOKENS":
+            return True
+    return False
+
+async def generate_code_text(prompt, query, language):
+    """
+    Generate a /generate-code reply, retrying once with the cap if it ran out
+    of its budget and without stop sequences if they cut it before the code
+    """
+    budget = GEMINI_MAX_OUTPUT_TOKENS
+    if GEMINI_OUTPUT_BUDGETS:
+        budget = output_token_budget(query, language, GEMINI_MAX_OUTPUT_TOKENS, GEMINI_THINKING_TOKENS)
+    response = await generate_content(prompt, generation_config=code_generation_config(budget))
+    if budget < GEMINI_MAX_OUTPUT_TOKENS and finished_at_limit(response):
+        metrics.LLM_BUDGET_RETRIES.inc(service=SERVICE, model=GEMINI_MODEL)
+        budget = GEMINI_MAX_OUTPUT_TOKENS
+        response = await generate_content(prompt, generation_config=code_generation_config(budget))
+    if not finished_at_limit(response) and stop_cut_before_code(response.text, language):
+        metrics.LLM_STOP_RETRIES.inc(service=SERVICE, model=GEMINI_MODEL)
+        response = await generate_content(
+            prompt, generation_config=code_generation_config(budget, stop=False))
+    return response.text.strip()
+
+def stream_content(prompt, **kwargs):
+    """Yield model.generate_content response text chunks as they arrive"""
+    return stream_chunks(partial(model.generate_content, prompt, stream=True, **kwargs), CODE_PROMPT)
+
+async def stream_chunks(start_stream, template):
+    """
+    Yield response text chunks from a streaming Gemini call as they arrive.
+    start_stream() is called and iterated on the generation pool, and the
+    chunks are handed back to the event loop through a queue.
+    """
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue()
+    cancelled = threading.Event()
+    done = object()
+
+    def produce():
+        try:
+            chunk = None
+            with metrics.track_llm_call(SERVICE, GEMINI_MODEL):
+                for chunk in start_stream():
+                    if cancelled.is_set():
+                        break
+                    loop.call_soon_threadsafe(queue.put_nowait, chunk.text)
+            # Usage totals arrive with the last chunk
+            record_usage(chunk, template)
+        except Exception as e:
+            loop.call_soon_threadsafe(queue.put_nowait, e)
+        finally:
+            loop.call_soon_threadsafe(queue.put_nowait, done)
+
+    producer = loop.run_in_executor(generation_executor, produce)
+    try:
+        while True:
+            item = await queue.get()
+            if item is done:
+                break
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        # Stop pulling from Gemini if the client went away mid-stream
+        cancelled.set()
+        await producer
+
+class SharedStream:
+    """
+    The deltas of one upstream stream, replayed to every subscriber from the
+    start: a caller that joins late catches up, then follows live. `task`
+    resolves to the stream's result.
+    """
+
+    def __init__(self, task=None):
+        self.deltas = []
+        self.task = task
+        self._changed = asyncio.Event()
+
+    def publish(self, delta):
+        self.deltas.append(delta)
+        self.notify()
+
+    def notify(self, *_):
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    async def subscribe(self):
+        """Yield every delta so far, then new ones until the stream ends"""
+        sent = 0
+        while True:
+            while sent < len(self.deltas):
+                yield self.deltas[sent]
+                sent += 1
+            if self.task.done():
+                return
+            await self._changed.wait()
+
+    async def result(self):
+        # A disconnecting client must not cancel the stream others are reading
+        return await asyncio.shield(self.task)
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls with the same key into one upstream call.
+    Callers that arrive while a call is running await its result; finished
+    results are kept for `ttl` seconds. Failures are shared but never cached.
+    Lookups are also counted in the shared metrics under `name`.
+    """
+
+    def __init__(self, ttl, max_size, name):
+        self.name = name
+        self.ttl = ttl
+        self.max_size = max_size
+        self._in_flight = {}
+        self._streams = {}
+        self._results = OrderedDict()
+        self.upstream_calls = 0
+        self.coalesced = 0
+        self.cache_hits = 0
+
+    async def run(self, key, call):
+        """Return call()'s result for key, sharing it with identical concurrent requests"""
+        value = self._cached(key)
+        if value is not None:
+            return value
+        # A disconnecting client must not cancel the call others are waiting on
+        return await asyncio.shield(self._join(key, call))
+
+    def stream(self, key, produce):
+        """
+        Streaming run(): produce(publish) passes each delta to publish() and
+        returns the result. Identical concurrent requests share one upstream
+        stream and each receives all of its deltas. A cached result, or one a
+        non-streaming call is computing, comes without deltas.
+        """
+        value = self._cached(key)
+        if value is not None:
+            done = asyncio.get_running_loop().create_future()
+            done.set_result(value)
+            return SharedStream(done)
+        shared = self._streams.get(key)
+        if shared is not None:
+            self._count_coalesced()
+            return shared
+        shared = SharedStream()
+        shared.task = self._join(key, partial(produce, shared.publish))
+        shared.task.add_done_callback(shared.notify)
+        self._streams[key] = shared
+        return shared
+
+    def _cached(self, key):
+        cached = self._results.get(key)
+        if cached is not None:
+            expires, value = cached
+            if expires > time.monotonic():
+                self._results.move_to_end(key)
+                self.cache_hits += 1
+                metrics.CACHE_REQUESTS.inc(cache=self.name, result="hit")
+                return value
+            del self._results[key]
+        return None
+
+    def _join(self, key, call):
+        """The in-flight task for key, started with call() if there is none"""
+        task = self._in_flight.get(key)
+        if task is None:
+            self.upstream_calls += 1
+            metrics.CACHE_REQUESTS.inc(cache=self.name, result="miss")
+            task = asyncio.ensure_future(call())
+            self._in_flight[key] = task
+            task.add_done_callback(partial(self._finish, key))
+        else:
+            self._count_coalesced()
+        return task
+
+    def _count_coalesced(self):
+        self.coalesced += 1
+        metrics.CACHE_REQUESTS.inc(cache=self.name, result="coalesced")
+
+    def _finish(self, key, task):
+        self._in_flight.pop(key, None)
+        self._streams.pop(key, None)
+        if task.cancelled() or task.exception() is not None:
+            return
+        if self.ttl > 0:
+            self._results[key] = (time.monotonic() + self.ttl, task.result())
+            while len(self._results) > self.max_size:
+                self._results.popitem(last=False)
+
+    def stats(self):
+        return {
+            "upstream_calls": self.upstream_calls,
+            "coalesced": self.coalesced,
+            "cache_hits": self.cache_hits,
+            "calls_saved": self.coalesced + self.cache_hits,
+            "in_flight": len(self._in_flight),
+            "cached": len(self._results),
+        }
+
+code_generation_flight = SingleFlight(GENERATION_CACHE_TTL, GENERATION_CACHE_SIZE, "generate-code")
+
+class ChatConversation:
+    """History of one /chat session, in Gemini start_chat format"""
+
+    def __init__(self):
+        self.history = []
+        self.tokens = 0
+        self.last_used = time.monotonic()
+        # One turn at a time per session
+        self.lock = asyncio.Lock()
+
+    def start_chat(self):
+        return chat_model.start_chat(history=list(self.history))
+
+    def add_turn(self, user_text, model_text, token_budget):
+        """Record a finished exchange, then drop the oldest ones beyond the budget"""
+        self.history.append({"role": "user", "parts": [user_text]})
+        self.history.append({"role": "model", "parts": [model_text]})
+        self.tokens += estimate_tokens(user_text) + estimate_tokens(model_text)
+        # Always keep the latest exchange
+        while self.tokens > token_budget and len(self.history) > 2:
+            for turn in self.history[:2]:
+                self.tokens -= estimate_tokens(turn["parts"][0])
+            del self.history[:2]
+
+class ChatSessionStore:
+    """Chat sessions by id, evicting idle and least recently used ones"""
+
+    def __init__(self, max_sessions, ttl):
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self._sessions = OrderedDict()
+
+    def get(self, session_id=None):
+        """Return (session_id, conversation), starting a new session for unknown ids"""
+        now = time.monotonic()
+        # Least recently used first, so expired sessions are at the front
+        while self._sessions:
+            oldest = next(iter(self._sessions.values()))
+            if now - oldest.last_used <= self.ttl:
+                break
+            self._sessions.popitem(last=False)
+
+        conversation = self._sessions.get(session_id) if session_id else None
+        if conversation is None:
+            session_id = uuid.uuid4().hex
+            conversation = self._sessions[session_id] = ChatConversation()
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+        else:
+            self._sessions.move_to_end(session_id)
+        conversation.last_used = now
+        return session_id, conversation
+
+    def __len__(self):
+        return len(self._sessions)
+
+chat_sessions = ChatSessionStore(CHAT_MAX_SESSIONS, CHAT_SESSION_TTL)
+
+def sse_event(data, event=None):
+    """Encode a payload as a Server-Sent Events message"""
+    message = f"data: {json.dumps(data)}\n\n"
+    if event:
+        message = f"event: {event}\n" + message
+    return message
+
+def sse_response(events):
+    return StreamingResponse(
+        events,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+async def chat_event_stream(message, session_id, conversation):
+    try:
+        async with conversation.lock:
+            chat = conversation.start_chat()
+            prompt = CHAT_PROMPT.render(message=message)
+            chunks = []
+
+            async def collect():
+                send = partial(chat.send_message, prompt, stream=True)
+                async for text in stream_chunks(send, CHAT_PROMPT):
+                    chunks.append(text)
+                    yield text
+
+            async for text in format_chat_stream(collect()):
+                yield sse_event({"delta": text})
+            # Only a completed reply becomes part of the history
+            conversation.add_turn(message, ''.join(chunks), CHAT_HISTORY_TOKEN_BUDGET)
+        yield sse_event({"session_id": session_id}, event="done")
+    except Exception as e:
+        metrics.ERRORS.inc(service=SERVICE, operation="chat")
+        yield sse_event({"error": str(e), "session_id": session_id}, event="error")
+
+async def stream_generated_code(prompt, language, publish):
+    """
+    Stream one /generate-code reply from Gemini, passing each delta to
+    publish(), and return the extracted code
+    """
+    chunks = []
+    # A stream can't be retried once deltas are sent, so it gets the cap and
+    # is cut off at the end of the code block instead of using stop sequences
+    scanner = FenceScanner(language)
+    stream = stream_content(prompt, generation_config=code_generation_config(
+        GEMINI_MAX_OUTPUT_TOKENS, stop=False))
+    try:
+        async for text in stream:
+            chunks.append(text)
+            publish(text)
+            if scanner.feed(text):
+                break
+    finally:
+        # Stopping the Gemini stream waits for its next chunk, so it runs in
+        # the background instead of holding up the result
+        close_in_background(stream)
+    # The scanner has already read every delta; a reply without fences is the code itself
+    with metrics.CODE_EXTRACTION.time(service=SERVICE):
+        generated_code = scanner.code()
+    return generated_code if generated_code is not None else ''.join(chunks).strip()
+
+background_tasks = set()
+
+def close_in_background(stream):
+    task = asyncio.ensure_future(stream.aclose())
+    # The event loop only keeps weak references to tasks
+    background_tasks.add(task)
+    task.add_done_callback(background_tasks.discard)
+
+async def code_event_stream(shared, language):
+    try:
+        async for text in shared.subscribe():
+            yield sse_event({"delta": text})
+        generated_code = await shared.result()
+        yield sse_event(
+            {"code": generated_code, "language": language, "status": "success"},
+            event="done",
+        )
+    except Exception as e:
+        metrics.ERRORS.inc(service=SERVICE, operation="generate-code")
+        yield sse_event({"language": language, "status": "error", "error": str(e)}, event="error")
+
+def lcs_length(a, b):
+    """
+    Length of the longest common subsequence of two token lists.
+    Bit-parallel (Hyyro) algorithm: one big-integer update per token of a,
+    i.e. O(len(a) * len(b) / wordsize) instead of a quadratic Python loop.
+    """
+    if not a or not b:
+        return 0
+    # Bit i of masks[token] is set where b[i] == token
+    masks = {}
+    for i, token in enumerate(b):
+        masks[token] = masks.get(token, 0) | (1 << i)
+    full = (1 << len(b)) - 1
+    v = full
+    for token in a:
+        u = v & masks.get(token, 0)
+        v = ((v + u) | (v - u)) & full
+    # Every zero bit in v marks one matched position
+    return len(b) - bin(v).count('1')
+
+def sequence_similarity(gen_tokens, ref_tokens):
+    """Token-level equivalent of SequenceMatcher.ratio(): 2 * LCS / total tokens"""
+    gen_tokens = gen_tokens[:CODEBLEU_MAX_TOKENS]
+    ref_tokens = ref_tokens[:CODEBLEU_MAX_TOKENS]
+    total = len(gen_tokens) + len(ref_tokens)
+    if not total:
+        return 1.0
+    return 2.0 * lcs_length(gen_tokens, ref_tokens) / total
 
 def calculate_codebleu(generated_code, reference_code, language):
     """
@@ -52,8 +542,8 @@ def calculate_codebleu(generated_code, reference_code, language):
     """
     try:
         # Tokenize both codes
-        gen_tokens = re.findall(r'\b\w+\b|[^\w\s]', generated_code)
-        ref_tokens = re.findall(r'\b\w+\b|[^\w\s]', reference_code)
+        gen_tokens = TOKEN_PATTERN.findall(generated_code)
+        ref_tokens = TOKEN_PATTERN.findall(reference_code)
         
         if not ref_tokens:
             return 0.0
@@ -63,15 +553,15 @@ def calculate_codebleu(generated_code, reference_code, language):
         ref_set = set(ref_tokens)
         token_overlap = len(gen_set & ref_set) / len(ref_set) if ref_set else 0
         
-        # Calculate sequence similarity (structure)
-        sequence_matcher = SequenceMatcher(None, generated_code, reference_code)
-        sequence_ratio = sequence_matcher.ratio()
+        # Calculate sequence similarity (structure) over tokens
+        sequence_ratio = sequence_similarity(gen_tokens, ref_tokens)
         
         # Calculate line-level similarity
         gen_lines = [line.strip() for line in generated_code.split('\n') if line.strip()]
         ref_lines = [line.strip() for line in reference_code.split('\n') if line.strip()]
         
-        matching_lines = sum(1 for line in gen_lines if line in ref_lines)
+        ref_line_set = set(ref_lines)
+        matching_lines = sum(1 for line in gen_lines if line in ref_line_set)
         line_ratio = matching_lines / len(ref_lines) if ref_lines else 0
         
         # Weighted combination (CodeBLEU-inspired)
@@ -87,25 +577,24 @@ def calculate_codebleu(generated_code, reference_code, language):
 async def generate_code(request: CodeGenerationRequest):
     """Generate code based on user query"""
     try:
-        prompt = f"""You are an expert code generation AI. Generate ONLY the code without any explanations or comments.
-        
-User Request: {request.query}
-Language: {request.language}
+        # The fixed instructions are the model's system instruction
+        prompt = CODE_PROMPT.render(query=request.query, language=request.language)
 
-Requirements:
-1. Return ONLY the code - no explanations, no markdown, no text
-2. Make the code production-ready and well-structured
-3. Include proper error handling
-4. Use best practices for the {request.language} language
-5. If applicable, include comments only for complex logic
+        # Keyed on the prompt with whitespace collapsed, so double submits and
+        # identical queries from different users hit Gemini once, streamed or not
+        key = ' '.join(prompt.split())
 
-Generate the code now:"""
+        if request.stream:
+            shared = code_generation_flight.stream(
+                key, partial(stream_generated_code, prompt, request.language))
+            return sse_response(code_event_stream(shared, request.language))
 
-        response = model.generate_content(prompt)
-        generated_code = response.text.strip()
-        
-        # Clean up markdown if present
-        generated_code = extract_code_block(generated_code, request.language) or generated_code
+        async def generate():
+            text = await generate_code_text(prompt, request.query, request.language)
+            # Clean up markdown if present
+            return extract_generated_code(text, request.language)
+
+        generated_code = await code_generation_flight.run(key, generate)
         
         return {
             "code": generated_code,
@@ -113,6 +602,7 @@ Generate the code now:"""
             "status": "success"
         }
     except Exception as e:
+        metrics.ERRORS.inc(service=SERVICE, operation="generate-code")
         return {
             "code": "",
             "language": request.language,
@@ -125,11 +615,11 @@ async def validate_code(request: CodeValidationRequest):
     """Validate generated code using CodeBLEU metric"""
     try:
         # Clean up code blocks if present
-        generated = extract_code_block(request.generated_code, request.language) or request.generated_code
-        reference = extract_code_block(request.reference_code, request.language) or request.reference_code
+        generated = extract_code(request.generated_code, request.language)
+        reference = extract_code(request.reference_code, request.language)
         
-        # Calculate CodeBLEU score
-        score = calculate_codebleu(generated, reference, request.language)
+        # Calculate CodeBLEU score off the event loop
+        score = await asyncio.to_thread(calculate_codebleu, generated, reference, request.language)
         
         # Determine quality level
         if score >= 0.85:
@@ -150,6 +640,7 @@ async def validate_code(request: CodeValidationRequest):
             "status": "success"
         }
     except Exception as e:
+        metrics.ERRORS.inc(service=SERVICE, operation="validate-code")
         return {
             "codebleu_score": 0.0,
             "quality": "Error",
@@ -159,68 +650,35 @@ async def validate_code(request: CodeValidationRequest):
 
 @app.post("/chat")
 async def chat(msg: Message):
+    # Pass the returned session_id back to continue the conversation
+    session_id, conversation = chat_sessions.get(msg.session_id)
     try:
-        # Enhanced prompt for better formatted responses
-        enhanced_prompt = f"""Please provide a clear, well-organized response to: "{msg.message}"
-
-CRITICAL FORMATTING RULES - FOLLOW THESE EXACTLY:
-• Use **bold** for important terms and headings
-• Use ### for main section headings
-• Use ## for subsection headings
-• Use numbered lists (1. 2. 3.) for steps
-• Use proper paragraph breaks with blank lines
-• For code blocks, use ```python and ``` with proper indentation
-• Keep technical explanations simple but accurate and short
-• Structure responses with clear sections
-
-STRICTLY AVOID:
-• Using *• combinations (this creates ugly formatting)
-• Random asterisks anywhere in text
-• Using * for bullet points
-• Poorly formatted lists
-• Walls of text without breaks
-• Any markdown syntax that creates visual clutter
-• Inconsistent indentation in code blocks
-
-For code explanations:
-• Use clear numbered sections (1. 2. 3.)
-• Explain each part step by step
-• Use proper code block formatting with ```python
-• Keep code indentation clean and readable
-• Use bullet points for detailed explanations within sections
-
-Response Structure:
-1. Use numbered sections for main parts
-2. Explain code components easily
-3. Include practical examples where relevant
-
-Question: {msg.message}"""
-
-        response = model.generate_content(enhanced_prompt)
+        if msg.stream:
+            return sse_response(chat_event_stream(msg.message, session_id, conversation))
+
+        async with conversation.lock:
+            chat_session = conversation.start_chat()
+            response = await run_generation(CHAT_PROMPT, chat_session.send_message,
+                                            CHAT_PROMPT.render(message=msg.message))
+            conversation.add_turn(msg.message, response.text, CHAT_HISTORY_TOKEN_BUDGET)
 
         # Clean and format the response
-        formatted_response = response.text.strip()
-
-        # Basic formatting improvements
-        formatted_response = formatted_response.replace('\n\n\n', '\n\n')  # Remove excessive line breaks
-        formatted_response = formatted_response.replace('* ', '• ')  # Convert asterisks to bullets
-        formatted_response = formatted_response.replace('- ', '• ')  # Convert dashes to bullets
-        formatted_response = formatted_response.replace('*•', '')  # Remove *• combinations
-        formatted_response = formatted_response.replace('**', '**')  # Ensure proper bold markers
-
-        # Ensure proper spacing
-        lines = formatted_response.split('\n')
-        cleaned_lines = []
-        for line in lines:
-            line = line.strip()
-            if line:
-                cleaned_lines.append(line)
-
-        formatted_response = '\n\n'.join(cleaned_lines)
-
-        return {"response": formatted_response}
+        formatted_response = format_chat_response(response.text)
+
+        return {"response": formatted_response, "session_id": session_id}
     except Exception as e:
-        return {"response": f"❌ Error: {str(e)}"}
+        metrics.ERRORS.inc(service=SERVICE, operation="chat")
+        return {"response": f"❌ Error: {str(e)}", "session_id": session_id}
+
+@app.get("/generation-stats")
+async def generation_stats():
+    """Counters for /generate-code request coalescing and result caching"""
+    return code_generation_flight.stats()
+
+@app.get("/metrics")
+async def metrics_endpoint():
+    """Prometheus metrics: LLM latency, tokens and errors, cache lookups, request times"""
+    return Response(metrics.render(), media_type=metrics.CONTENT_TYPE)
 
 @app.get("/")
 async def root():
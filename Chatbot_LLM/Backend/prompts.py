@@ -0,0 +1,55 @@
+"""
+Prompt templates
+Each endpoint's fixed instructions live in a system instruction that is built
+into its Gemini model once at startup, so a request only adds its own fields.
+"""
+
+
+def estimate_tokens(text):
+    """Rough token count (~4 characters per token) for budgeting and reporting"""
+    return len(text) // 4 + 1
+
+
+class PromptTemplate:
+    """Fixed system instruction plus the per-request user prompt of one endpoint"""
+
+    def __init__(self, name, system_instruction, user_template):
+        self.name = name
+        self.system_instruction = system_instruction
+        self.user_template = user_template
+        # Fixed part of every request's prompt
+        self.system_tokens = estimate_tokens(system_instruction)
+
+    def render(self, **fields):
+        """The user prompt for one request"""
+        return self.user_template.format(**fields)
+
+    def build_model(self, model_name):
+        """A Gemini model that sends this template's system instruction"""
+        import google.generativeai as genai
+        return genai.GenerativeModel(model_name, system_instruction=self.system_instruction)
+
+
+# /chat: the UI renders this layout (see chat_formatter.py)
+CHAT_PROMPT = PromptTemplate(
+    "chat",
+    """You are a helpful assistant. Give clear, well-organized, short answers.
+
+Formatting:
+1. **bold** for key terms; ### for sections, ## for subsections
+2. Numbered lists (1. 2. 3.) for steps and the main parts of an answer
+3. Blank lines between paragraphs; no walls of text
+4. Code in ``` fences with the language name (```python) and clean indentation
+5. Explain code step by step, with short practical examples where useful
+
+Never use * as a bullet, "*•", stray asterisks or other decorative markdown.""",
+    "{message}",
+)
+
+# /generate-code
+CODE_PROMPT = PromptTemplate(
+    "generate-code",
+    """You are an expert code generation AI. Reply with ONLY the code, in one markdown code block tagged with the requested language (```python): no explanations, no text outside the block.
+The code must be production-ready and well-structured, handle errors properly and follow the best practices of the requested language. Comment only complex logic.""",
+    "Language: {language}\nRequest: {query}",
+)
@@ -1,5 +1,6 @@
 import React, { useState } from 'react';
 import { Copy, Download, Zap } from 'lucide-react';
+import { codeAPI } from '../services/api';
 import '../styles/CodeGenerator.css';
 
 const CodeGenerator = () => {
@@ -16,19 +17,11 @@ const CodeGenerator = () => {
     }
 
     setLoading(true);
+    setGeneratedCode('');
     try {
-      const response = await fetch(`${process.env.REACT_APP_BACKEND_URL}/generate-code`, {
-        method: 'POST',
-        headers: { 'Content-Type': 'application/json' },
-        body: JSON.stringify({ query, language })
-      });
-
-      const data = await response.json();
-      if (data.status === 'success') {
-        setGeneratedCode(data.code);
-      } else {
-        alert('Error: ' + (data.error || 'Failed to generate code'));
-      }
+      // Show raw tokens while streaming, then the cleaned-up code block
+      const code = await codeAPI.generateCodeStream(query, language, setGeneratedCode);
+      setGeneratedCode(code);
     } catch (error) {
       alert('Error: ' + error.message);
     } finally {
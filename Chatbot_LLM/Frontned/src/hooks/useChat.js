@@ -13,6 +13,8 @@ export const useChat = () => {
   const [input, setInput] = useState('');
   const [isLoading, setIsLoading] = useState(false);
   const messagesEndRef = useRef(null);
+  // Server-side conversation this chat belongs to (set by the first reply)
+  const sessionIdRef = useRef(null);
 
   const scrollToBottom = () => {
     messagesEndRef.current?.scrollIntoView({ behavior: 'smooth' });
@@ -37,17 +39,26 @@ export const useChat = () => {
     setInput('');
     setIsLoading(true);
 
-    try {
-      const botResponse = await chatAPI.sendMessage(messageToSend);
+    const botMessageId = Date.now() + 1;
+    let botMessageAdded = false;
 
-      const botMessage = {
-        id: Date.now() + 1,
-        text: botResponse,
-        sender: 'bot',
-        timestamp: new Date()
-      };
-
-      setMessages(prev => [...prev, botMessage]);
+    try {
+      const reply = await chatAPI.streamMessage(messageToSend, (textSoFar) => {
+        if (!botMessageAdded) {
+          botMessageAdded = true;
+          setMessages(prev => [...prev, {
+            id: botMessageId,
+            text: textSoFar,
+            sender: 'bot',
+            timestamp: new Date()
+          }]);
+        } else {
+          setMessages(prev => prev.map(msg =>
+            msg.id === botMessageId ? { ...msg, text: textSoFar } : msg
+          ));
+        }
+      }, sessionIdRef.current);
+      sessionIdRef.current = reply.sessionId;
     } catch (error) {
       const errorMessage = {
         id: Date.now() + 1,
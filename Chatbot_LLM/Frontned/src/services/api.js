@@ -1,14 +1,55 @@
 const API_BASE_URL = process.env.REACT_APP_BACKEND_URL || 'http://localhost:8000';
 
+// POST a JSON body and read the Server-Sent Events reply as it arrives.
+// Calls onEvent(eventName, data) for every event in the stream.
+const postEventStream = async (path, body, onEvent) => {
+  const response = await fetch(`${API_BASE_URL}${path}`, {
+    method: 'POST',
+    headers: {
+      'Content-Type': 'application/json',
+      Accept: 'text/event-stream',
+    },
+    body: JSON.stringify({ ...body, stream: true }),
+  });
+
+  if (!response.ok) {
+    throw new Error(`HTTP error! status: ${response.status}`);
+  }
+
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = '';
+
+  while (true) {
+    const { done, value } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+
+    // Events are separated by a blank line; keep any partial event buffered
+    const events = buffer.split('\n\n');
+    buffer = events.pop();
+
+    for (const rawEvent of events) {
+      let eventName = 'message';
+      let data = '';
+      for (const line of rawEvent.split('\n')) {
+        if (line.startsWith('event: ')) eventName = line.slice(7);
+        else if (line.startsWith('data: ')) data += line.slice(6);
+      }
+      if (data) onEvent(eventName, JSON.parse(data));
+    }
+  }
+};
+
 export const chatAPI = {
-  async sendMessage(message) {
+  async sendMessage(message, sessionId = null) {
     try {
       const response = await fetch(`${API_BASE_URL}/chat`, {
         method: 'POST',
         headers: {
           'Content-Type': 'application/json',
         },
-        body: JSON.stringify({ message }),
+        body: JSON.stringify({ message, session_id: sessionId }),
       });
 
       if (!response.ok) {
@@ -23,6 +64,34 @@ export const chatAPI = {
     }
   },
 
+  // Stream the reply token by token. onToken receives the text so far.
+  // Pass the returned sessionId with the next message to continue the conversation.
+  async streamMessage(message, onToken, sessionId = null) {
+    let text = '';
+    let streamError = null;
+    let replySessionId = sessionId;
+    try {
+      await postEventStream('/chat', { message, session_id: sessionId }, (event, data) => {
+        if (data.session_id) {
+          replySessionId = data.session_id;
+        }
+        if (event === 'error') {
+          streamError = data.error;
+        } else if (data.delta) {
+          text += data.delta;
+          onToken(text);
+        }
+      });
+    } catch (error) {
+      console.error('API Error:', error);
+      throw new Error('Failed to send message. Please try again.');
+    }
+    if (streamError) {
+      throw new Error(`❌ Error: ${streamError}`);
+    }
+    return { text, sessionId: replySessionId };
+  },
+
   async checkHealth() {
     try {
       const response = await fetch(`${API_BASE_URL}/`);
@@ -31,4 +100,25 @@ export const chatAPI = {
       return false;
     }
   }
-};
\ No newline at end of file
+};
+
+export const codeAPI = {
+  // Stream generated code. onToken receives the raw text so far; the
+  // returned promise resolves to the final extracted code.
+  async generateCodeStream(query, language, onToken) {
+    let text = '';
+    let result = null;
+    await postEventStream('/generate-code', { query, language }, (event, data) => {
+      if (event === 'done' || event === 'error') {
+        result = data;
+      } else if (data.delta) {
+        text += data.delta;
+        onToken(text);
+      }
+    });
+    if (!result || result.status !== 'success') {
+      throw new Error((result && result.error) || 'Failed to generate code');
+    }
+    return result.code;
+  }
+};
@@ -2,6 +2,8 @@
 Streamlit UI for AI Code Generator and CodeBLEU Evaluator
 """
 
+import hashlib
+import json
 import os
 from typing import Optional
 
@@ -17,11 +19,36 @@ except Exception:
 
 from code_generator import CodeGenerator
 from code_evaluator import CodeBLEUEvaluator
+from response_cache import MemoryCache
 
 
 @st.cache_resource(show_spinner=False)
-def get_services(api_key: Optional[str], model: str):
-	return CodeGenerator(api_key=api_key, model=model), CodeBLEUEvaluator()
+def get_response_cache():
+	# Shared across models and sessions; keys include the model name
+	return MemoryCache(max_size=512, ttl=3600)
+
+
+@st.cache_resource(show_spinner=False)
+def get_evaluator():
+	return CodeBLEUEvaluator()
+
+
+@st.cache_resource(show_spinner=False)
+def get_services(api_key: Optional[str]):
+	# The model is chosen per request, so switching models reuses the same
+	# generator and its pooled HTTP connections
+	return CodeGenerator(api_key=api_key, cache=get_response_cache()), get_evaluator()
+
+
+@st.cache_data(show_spinner=False, max_entries=256)
+def evaluate_code(generated_code: str, reference_code: str, language: str):
+	# Memoized on the inputs' content: unchanged code, reference and language
+	# are never scored twice
+	return get_evaluator().evaluate(generated_code, reference_code, language=language)
+
+
+def content_key(*parts: str) -> str:
+	return hashlib.sha256(json.dumps(parts).encode("utf-8")).hexdigest()
 
 
 LANG_TO_EXT = {
@@ -49,6 +76,8 @@ def main():
 		"query_input": "",
 		"reference_code_input": "",
 		"generated_code": "",
+		# Hash of the (prompt, language, model) that produced generated_code
+		"generation_key": None,
 		"evaluation_results": None,
 		"language_select": default_language,
 		"filename_input": f"generated_code.{LANG_TO_EXT.get(default_language, 'txt')}",
@@ -61,6 +90,7 @@ def main():
 		st.session_state["query_input"] = ""
 		st.session_state["reference_code_input"] = ""
 		st.session_state["generated_code"] = ""
+		st.session_state["generation_key"] = None
 		st.session_state["evaluation_results"] = None
 		current_lang = st.session_state.get("language_select", default_language)
 		st.session_state["filename_input"] = f"generated_code.{LANG_TO_EXT.get(current_lang, 'txt')}"
@@ -130,7 +160,15 @@ def main():
 			height=160,
 			key="reference_code_input",
 		)
-		evaluate_btn = st.button("Generate and Evaluate")
+		col_evaluate, col_reevaluate = st.columns(2)
+		with col_evaluate:
+			evaluate_btn = st.button("Generate and Evaluate")
+		with col_reevaluate:
+			reevaluate_btn = st.button(
+				"Re-evaluate",
+				disabled=not st.session_state["generated_code"],
+				help="Score the current code against the reference without generating again",
+			)
 
 	with col_output:
 		st.subheader("Generated Code")
@@ -149,14 +187,26 @@ def main():
 			return
 
 		try:
-			generator, evaluator = get_services(api_key, model)
-			code = generator.generate_code(query=query, language=language)
-			st.session_state["generated_code"] = code
+			# "Generate Code" always asks the model for a new sample. For
+			# "Generate and Evaluate", only a changed prompt, language or model
+			# needs a new generation; editing the reference just re-scores the
+			# code we already have
+			generation_key = content_key(query, language, model)
+			code = st.session_state["generated_code"]
+			if generate_btn or not code or generation_key != st.session_state["generation_key"]:
+				generator, _ = get_services(api_key)
+				code = generator.generate_code(
+					query=query,
+					language=language,
+					model=model,
+					use_cache=not generate_btn,
+				)
+				st.session_state["generated_code"] = code
+				st.session_state["generation_key"] = generation_key
 			st.session_state["evaluation_results"] = None
 
 			if evaluate_btn and reference_code.strip():
-				results = evaluator.evaluate(code, reference_code, language=language)
-				st.session_state["evaluation_results"] = results
+				st.session_state["evaluation_results"] = evaluate_code(code, reference_code, language)
 
 		except Exception as e:
 			st.error(f"Error: {e}")
@@ -166,6 +216,19 @@ def main():
 		if rerun_func:
 			rerun_func()
 
+	elif reevaluate_btn:
+		if not reference_code.strip():
+			st.error("Please paste reference code to evaluate against.")
+			return
+		try:
+			st.session_state["evaluation_results"] = evaluate_code(generated_code, reference_code, language)
+		except Exception as e:
+			st.error(f"Error: {e}")
+			return
+
+		if rerun_func:
+			rerun_func()
+
 	# display stored code/results
 	if generated_code:
 		code_container.code(generated_code, language=language)
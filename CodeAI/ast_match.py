@@ -0,0 +1,145 @@
+"""
+Tree-sitter AST matching for the CodeBLEU evaluator
+Parsers are created once per language per thread, and subtree profiles are cached by code hash
+"""
+
+import hashlib
+import threading
+import zlib
+from collections import Counter, OrderedDict
+from typing import Optional
+
+# Grammar module per supported language (from requirements.txt)
+GRAMMAR_MODULES = {
+    "python": "tree_sitter_python",
+    "java": "tree_sitter_java",
+    "cpp": "tree_sitter_cpp",
+    "c++": "tree_sitter_cpp",
+}
+
+_languages = {}
+_languages_lock = threading.Lock()
+_thread_parsers = threading.local()
+
+# Subtree profiles keyed by (language, code hash), so a reference shared by
+# many pairs is parsed once
+_PROFILE_CACHE_SIZE = 1024
+_profile_cache: "OrderedDict[tuple, Counter]" = OrderedDict()
+_profile_lock = threading.Lock()
+
+# Node types as stable integers. hash() of a str changes between processes,
+# and profiles built in worker processes must match the parent's.
+_type_ids = {}
+
+
+def _load_language(language: str):
+    """Load a tree-sitter Language once per process (None if unavailable)."""
+    with _languages_lock:
+        if language in _languages:
+            return _languages[language]
+        ts_language = None
+        module_name = GRAMMAR_MODULES.get(language)
+        if module_name:
+            try:
+                import importlib
+                from tree_sitter import Language
+                grammar = importlib.import_module(module_name)
+                try:
+                    ts_language = Language(grammar.language())
+                except TypeError:
+                    # tree-sitter < 0.22 also wants the language name
+                    ts_language = Language(grammar.language(), language)
+            except Exception:
+                ts_language = None
+        _languages[language] = ts_language
+        return ts_language
+
+
+def get_parser(language: str):
+    """
+    Return this thread's parser for language, creating it on first use.
+    Parsers are not thread-safe, so each thread keeps its own pool.
+    """
+    parsers = getattr(_thread_parsers, "parsers", None)
+    if parsers is None:
+        parsers = _thread_parsers.parsers = {}
+    if language not in parsers:
+        ts_language = _load_language(language)
+        parser = None
+        if ts_language is not None:
+            from tree_sitter import Parser
+            try:
+                parser = Parser(ts_language)
+            except TypeError:
+                parser = Parser()
+                parser.set_language(ts_language)
+        parsers[language] = parser
+    return parsers[language]
+
+
+def is_supported(language: str) -> bool:
+    """True if a tree-sitter grammar is installed for language."""
+    return get_parser(language) is not None
+
+
+def subtree_profile(code: str, language: str) -> Optional[Counter]:
+    """
+    Parse code and count its subtrees by structural signature.
+
+    A subtree's signature is its node type plus the signatures of its named
+    children (identifiers and literals are compared by type, not text;
+    comments are ignored).
+    Leaf nodes are skipped, as in CodeBLEU's syntax match.
+
+    Returns:
+        Counter of subtree signatures, or None if the language isn't supported
+    """
+    key = (language, hashlib.sha1(code.encode("utf-8")).hexdigest())
+    with _profile_lock:
+        profile = _profile_cache.get(key)
+        if profile is not None:
+            _profile_cache.move_to_end(key)
+            return profile
+
+    parser = get_parser(language)
+    if parser is None:
+        return None
+    tree = parser.parse(code.encode("utf-8"))
+
+    # Iterative post-order walk; a node's signature hashes its type id and
+    # its children's signatures (ints and tuples of ints hash the same in
+    # every process)
+    profile = Counter()
+    signatures = {}
+    stack = [(tree.root_node, None)]
+    while stack:
+        node, children = stack.pop()
+        if children is None:
+            # Comments don't change the structure of the code
+            children = [child for child in node.named_children if "comment" not in child.type]
+            stack.append((node, children))
+            stack.extend((child, None) for child in children)
+            continue
+        child_sigs = tuple(signatures.pop(child.id) for child in children)
+        type_id = _type_ids.get(node.type)
+        if type_id is None:
+            type_id = _type_ids[node.type] = zlib.crc32(node.type.encode("utf-8"))
+        signature = hash((type_id, child_sigs))
+        signatures[node.id] = signature
+        if children:
+            profile[signature] += 1
+
+    with _profile_lock:
+        _profile_cache[key] = profile
+        while len(_profile_cache) > _PROFILE_CACHE_SIZE:
+            _profile_cache.popitem(last=False)
+    return profile
+
+
+def subtree_match(generated: Counter, reference: Counter) -> float:
+    """Fraction of reference subtrees that also occur in the generated code."""
+    total = sum(reference.values())
+    if not total:
+        return 1.0 if not generated else 0.0
+    matches = sum(min(count, reference[sig]) for sig, count in generated.items())
+    return matches / total
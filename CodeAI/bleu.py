@@ -0,0 +1,101 @@
+"""
+BLEU-4 for source code
+Code-aware tokenizer and n-gram statistics; scores match nltk's
+sentence_bleu / corpus_bleu on the same tokens
+"""
+
+import math
+import re
+from collections import Counter
+from typing import List, Optional, Sequence
+
+# Identifiers/numbers, multi-character operators, then any other symbol
+TOKEN_PATTERN = re.compile(
+    r'\w+'
+    r'|==|!=|<=|>=|->|=>|::|\*\*|//|&&|\|\||<<|>>|\+\+|--|[-+*/%&|^]='
+    r'|[^\w\s]'
+)
+
+MAX_N = 4
+
+# Smoothing methods, named after nltk's SmoothingFunction:
+# "epsilon" = method1 (0.1 added to zero match counts),
+# "add-one" = method2 (Lin & Och 2004: +1 to matches and totals for n > 1)
+SMOOTHING_METHODS = (None, "epsilon", "add-one")
+EPSILON = 0.1
+
+
+def tokenize_code(code: str) -> List[str]:
+    """Split code into identifier, number, operator and punctuation tokens."""
+    return TOKEN_PATTERN.findall(code)
+
+
+def ngram_counts(tokens: Sequence[str], max_n: int = MAX_N) -> List[Counter]:
+    """Counters of 1..max_n-grams of a token list."""
+    return [Counter(zip(*[tokens[i:] for i in range(n)])) if n > 1 else Counter(tokens)
+            for n in range(1, max_n + 1)]
+
+
+def bleu_stats(hyp_tokens: Sequence[str], ref_ngrams: List[Counter], ref_len: int) -> List[int]:
+    """
+    BLEU sufficient statistics for one hypothesis/reference pair:
+    [hypothesis length, reference length, matches_1, total_1, ..., matches_4, total_4]
+
+    Statistics add up across pairs, so corpus BLEU is bleu_from_stats of the sums.
+    """
+    stats = [len(hyp_tokens), ref_len]
+    for n, hyp_counts in enumerate(ngram_counts(hyp_tokens, len(ref_ngrams)), start=1):
+        ref_counts = ref_ngrams[n - 1]
+        matches = sum([min(hyp_counts[ngram], ref_counts[ngram])
+                       for ngram in hyp_counts.keys() & ref_counts.keys()])
+        # nltk counts at least one n-gram per sentence, even when it is too short
+        stats.extend([matches, max(1, len(hyp_tokens) - n + 1)])
+    return stats
+
+
+def bleu_from_stats(stats: Sequence[int], smoothing: Optional[str] = None) -> float:
+    """
+    BLEU-4 with uniform weights from (summed) sufficient statistics.
+
+    Args:
+        stats: Output of bleu_stats, or the element-wise sum over a corpus
+        smoothing: None, "epsilon" or "add-one" (see SMOOTHING_METHODS)
+
+    Returns:
+        BLEU score between 0 and 1
+    """
+    if smoothing not in SMOOTHING_METHODS:
+        raise ValueError(f"Unknown BLEU smoothing {smoothing!r}; use one of {SMOOTHING_METHODS}")
+    hyp_len, ref_len = stats[0], stats[1]
+    matches, totals = stats[2::2], stats[3::2]
+    if hyp_len == 0 or matches[0] == 0:
+        return 0.0
+
+    weight = 1 / len(matches)
+    log_precisions = []
+    for n, (match, total) in enumerate(zip(matches, totals), start=1):
+        if smoothing == "add-one" and n > 1:
+            match, total = match + 1, total + 1
+        elif smoothing == "epsilon" and match == 0:
+            match = EPSILON
+        if match == 0:
+            return 0.0
+        log_precisions.append(weight * math.log(match / total))
+
+    brevity_penalty = 1.0 if hyp_len > ref_len else math.exp(1 - ref_len / hyp_len)
+    return brevity_penalty * math.exp(math.fsum(log_precisions))
+
+
+def sentence_bleu(hyp_tokens: Sequence[str], ref_tokens: Sequence[str],
+                  smoothing: Optional[str] = None) -> float:
+    """BLEU-4 of one tokenized hypothesis against one tokenized reference."""
+    return bleu_from_stats(bleu_stats(hyp_tokens, ngram_counts(ref_tokens), len(ref_tokens)), smoothing)
+
+
+def corpus_bleu(pairs, smoothing: Optional[str] = None) -> float:
+    """Corpus BLEU-4 over (hypothesis tokens, reference tokens) pairs."""
+    totals = [0] * (2 + 2 * MAX_N)
+    for hyp_tokens, ref_tokens in pairs:
+        stats = bleu_stats(hyp_tokens, ngram_counts(ref_tokens), len(ref_tokens))
+        totals = [a + b for a, b in zip(totals, stats)]
+    return bleu_from_stats(totals, smoothing)
@@ -3,11 +3,110 @@ CodeBLEU Evaluation Tool
 Evaluates generated code correctness using CodeBLEU metric
 """
 
-import re
-from typing import List, Tuple, Optional, Dict
-import subprocess
+import json
+from collections import Counter, OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import islice
+from time import perf_counter
+from typing import List, Tuple, Optional, Dict, Iterable, Iterator, Union, Any
 import sys
 import os
+import threading
+
+from ast_match import subtree_profile, subtree_match
+from bleu import bleu_from_stats, bleu_stats, ngram_counts, tokenize_code
+from code_lexer import get_lexer, LexedCode
+
+# Puts llm_common/ (at the repository root) on sys.path
+import shared_modules  # noqa: F401
+from llm_common.metrics import CODEBLEU_STAGE
+
+
+# Per-process evaluator used by batch workers (created by _init_worker)
+_worker_evaluator = None
+
+# Pools for evaluate(..., parallel=...), created on first use. Each call
+# submits at most two parses (generated and reference).
+PARALLEL_MODES = (None, "threads", "processes")
+_component_pools: Dict[str, Any] = {}
+_component_pools_lock = threading.Lock()
+
+
+def _component_pool(mode: str):
+    with _component_pools_lock:
+        pool = _component_pools.get(mode)
+        if pool is None:
+            pool_class = ThreadPoolExecutor if mode == "threads" else ProcessPoolExecutor
+            pool = _component_pools[mode] = pool_class(max_workers=2)
+        return pool
+
+
+def _safe_subtree_profile(code: str, language: str) -> Optional[Counter]:
+    """Tree-sitter subtree profile, or None if the code can't be parsed."""
+    try:
+        return subtree_profile(code, language)
+    except Exception:
+        return None
+
+
+def _init_worker(evaluator_class: type, config: Dict[str, Any]) -> None:
+    """Create the worker process's evaluator with the parent evaluator's settings."""
+    global _worker_evaluator
+    _worker_evaluator = evaluator_class(**config)
+
+
+def _evaluate_chunk(chunk: List[Tuple[str, str, str]]) -> List[Tuple[Dict[str, float], List[int]]]:
+    """Score a chunk of (generated, reference, language) pairs in a worker process."""
+    return [_worker_evaluator._evaluate_with_stats(gen, ref, lang) for gen, ref, lang in chunk]
+
+
+def _iter_pairs(source: Union[str, Iterable[Any]], language: str) -> Iterator[Tuple[Any, str, str, str]]:
+    """
+    Normalize a batch source into (id, generated, reference, language) tuples.
+    Accepts a JSONL path or an iterable of dicts / (generated, reference) tuples.
+    Dict records use the keys generated_code, reference_code and optional language, id.
+    """
+    if isinstance(source, str):
+        def records(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    if line.strip():
+                        yield json.loads(line)
+        source = records(source)
+    
+    for index, item in enumerate(source):
+        if isinstance(item, dict):
+            yield (item.get("id", index), item["generated_code"], item["reference_code"],
+                   item.get("language") or language)
+        else:
+            generated, reference = item[0], item[1]
+            yield index, generated, reference, language
+
+
+class PreparedReference:
+    """
+    Reference-side features computed once and reused for every candidate.
+    Create with CodeBLEUEvaluator.prepare_reference.
+    """
+    
+    def __init__(self, evaluator: "CodeBLEUEvaluator", code: str, language: str = "python",
+                 parse_ast: bool = True):
+        """
+        Args:
+            evaluator: Evaluator whose tokenizer and extractors are used
+            code: Reference code
+            language: Programming language of the code
+            parse_ast: False leaves ast_profile for the caller to fill in
+        """
+        self.code = code
+        self.language = language
+        lexed = evaluator._lex(code, language)
+        self.normalized = lexed.normalized
+        self.tokens = evaluator._bleu_tokenize(self.normalized)
+        self.ngram_counts = ngram_counts(self.tokens)
+        self.keywords = lexed.keywords | lexed.definitions
+        self.variables = lexed.assignments
+        self.ast_profile = _safe_subtree_profile(code, language) if parse_ast else None
 
 
 class CodeBLEUEvaluator:
@@ -16,29 +115,26 @@ class CodeBLEUEvaluator:
     CodeBLEU combines BLEU score with code-specific metrics.
     """
     
-    def __init__(self):
-        """Initialize the CodeBLEU evaluator."""
-        self._ensure_dependencies()
-    
-    def _ensure_dependencies(self):
-        """Ensure required dependencies are installed."""
-        try:
-            import nltk
-            # Try to download punkt if not available
-            try:
-                nltk.data.find('tokenizers/punkt')
-            except LookupError:
-                nltk.download('punkt', quiet=True)
-        except ImportError:
-            print("Warning: nltk not found. Some features may be limited.")
-            print("Install with: pip install nltk")
-        
-        # tree-sitter is optional for enhanced AST matching
-        try:
-            import tree_sitter
-        except ImportError:
-            # tree-sitter is optional, will use fallback methods
-            pass
+    def __init__(self, bleu_smoothing: Optional[str] = "add-one", parallel: Optional[str] = None):
+        """
+        Initialize the CodeBLEU evaluator.
+        
+        Args:
+            bleu_smoothing: Smoothing for per-pair BLEU: "add-one" (Lin & Och),
+                            "epsilon" or None. Corpus BLEU is never smoothed.
+            parallel: Run the tree-sitter AST scoring of each evaluate() call
+                      alongside the text-based scores (None = one after
+                      another). "processes" overlaps the whole parse and
+                      subtree walk; "threads" only the parse itself, which
+                      runs without the GIL. Pays off for large files on a
+                      multi-core machine.
+        """
+        if parallel not in PARALLEL_MODES:
+            raise ValueError(f"parallel must be one of {PARALLEL_MODES}")
+        self.bleu_smoothing = bleu_smoothing
+        self.parallel = parallel
+        # Recently used references, so repeated evaluate() calls reuse them
+        self._prepared: "OrderedDict[tuple, PreparedReference]" = OrderedDict()
     
     def evaluate(self, generated_code: str, reference_code: str, language: str = "python") -> Dict[str, float]:
         """
@@ -52,17 +148,104 @@ class CodeBLEUEvaluator:
         Returns:
             Dictionary containing CodeBLEU score and component scores
         """
-        # Normalize code (remove whitespace differences)
-        gen_normalized = self._normalize_code(generated_code)
-        ref_normalized = self._normalize_code(reference_code)
+        return self._evaluate_with_stats(generated_code, reference_code, language)[0]
+    
+    def prepare_reference(self, reference_code: str, language: str = "python") -> PreparedReference:
+        """
+        Precompute the reference side of the metric (tokens, n-grams, keywords,
+        variables, AST) for scoring many candidates against one reference.
+        
+        Args:
+            reference_code: The correct/reference code
+            language: Programming language of the code
+        
+        Returns:
+            PreparedReference to pass to evaluate_many
+        """
+        prepared = self._cached_reference(reference_code, language)
+        if prepared is None:
+            with CODEBLEU_STAGE.time(stage="prepare_reference"):
+                prepared = PreparedReference(self, reference_code, language)
+            self._remember_reference(prepared)
+        return prepared
+    
+    def _cached_reference(self, reference_code: str, language: str) -> Optional[PreparedReference]:
+        key = (language, reference_code)
+        prepared = self._prepared.get(key)
+        if prepared is not None:
+            self._prepared.move_to_end(key)
+        return prepared
+    
+    def _remember_reference(self, prepared: PreparedReference):
+        self._prepared[(prepared.language, prepared.code)] = prepared
+        if len(self._prepared) > 128:
+            self._prepared.popitem(last=False)
+    
+    def evaluate_many(self, candidates: Iterable[str], reference: Union[str, PreparedReference],
+                      language: str = "python") -> List[Dict[str, float]]:
+        """
+        Evaluate several generated candidates against the same reference.
+        
+        Args:
+            candidates: Generated code strings
+            reference: Reference code or a PreparedReference
+            language: Programming language (ignored for a PreparedReference)
+        
+        Returns:
+            List of evaluation dictionaries, one per candidate
+        """
+        if not isinstance(reference, PreparedReference):
+            reference = self.prepare_reference(reference, language)
+        return [self._evaluate_with_stats(candidate, reference)[0] for candidate in candidates]
+    
+    def _evaluate_with_stats(self, generated_code: str, reference: Union[str, PreparedReference],
+                             language: str = "python") -> Tuple[Dict[str, float], List[int]]:
+        """Evaluate a pair and also return its BLEU n-gram statistics for corpus scoring."""
+        ast_jobs = None
+        if self.parallel:
+            # Start the tree-sitter work first so it overlaps with the text-based scores
+            reference, ast_jobs = self._submit_ast_jobs(generated_code, reference, language)
+        elif not isinstance(reference, PreparedReference):
+            reference = self.prepare_reference(reference, language)
+        language = reference.language
+        
+        # Stage timings for the shared metrics
+        start = perf_counter()
+        # Normalize code and extract keywords/variables in one lexer pass
+        lexed = self._lex(generated_code, language)
+        lexed_at = perf_counter()
         
         # Calculate BLEU score (n-gram overlap)
-        bleu_score = self._calculate_bleu(gen_normalized, ref_normalized)
+        gen_tokens = self._bleu_tokenize(lexed.normalized)
+        pair_stats = bleu_stats(gen_tokens, reference.ngram_counts, len(reference.tokens))
+        bleu_score = bleu_from_stats(pair_stats, self.bleu_smoothing)
+        bleu_at = perf_counter()
         
         # Calculate code-specific metrics
-        syntax_match = self._syntax_match_score(gen_normalized, ref_normalized, language)
-        dataflow_match = self._dataflow_match_score(gen_normalized, ref_normalized, language)
-        ast_match = self._ast_match_score(gen_normalized, ref_normalized, language)
+        syntax_match = self._set_match(lexed.keywords | lexed.definitions, reference.keywords)
+        syntax_at = perf_counter()
+        dataflow_match = self._set_match(lexed.assignments, reference.variables)
+        dataflow_at = perf_counter()
+        # AST matching parses the original code, since normalization strips indentation
+        ast_match = None
+        if ast_jobs is not None:
+            ast_match = self._collect_ast_jobs(reference, *ast_jobs)
+        elif reference.ast_profile is not None:
+            try:
+                ast_match = subtree_match(subtree_profile(generated_code, language),
+                                          reference.ast_profile)
+            except Exception:
+                pass
+        if ast_match is None:
+            # Fallback to syntax match
+            ast_match = syntax_match
+        ast_at = perf_counter()
+        
+        CODEBLEU_STAGE.observe(lexed_at - start, stage="lex")
+        CODEBLEU_STAGE.observe(bleu_at - lexed_at, stage="bleu")
+        CODEBLEU_STAGE.observe(syntax_at - bleu_at, stage="syntax_match")
+        CODEBLEU_STAGE.observe(dataflow_at - syntax_at, stage="dataflow_match")
+        CODEBLEU_STAGE.observe(ast_at - dataflow_at, stage="ast_match")
         
         # Calculate CodeBLEU (weighted combination)
         codebleu_score = (
@@ -72,7 +255,7 @@ class CodeBLEUEvaluator:
             0.25 * ast_match
         )
         
-        return {
+        results = {
             "codebleu": codebleu_score,
             "bleu": bleu_score,
             "syntax_match": syntax_match,
@@ -80,43 +263,162 @@ class CodeBLEUEvaluator:
             "ast_match": ast_match,
             "is_correct": codebleu_score >= 0.75  # Threshold for correctness
         }
+        return results, pair_stats
     
-    def _normalize_code(self, code: str) -> str:
-        """Normalize code by removing extra whitespace and comments."""
-        # Remove comments
-        code = re.sub(r'#.*$', '', code, flags=re.MULTILINE)
-        code = re.sub(r'//.*$', '', code, flags=re.MULTILINE)
-        code = re.sub(r'/\*.*?\*/', '', code, flags=re.DOTALL)
+    def _submit_ast_jobs(self, generated_code: str, reference: Union[str, PreparedReference],
+                         language: str) -> Tuple[PreparedReference, Tuple[Optional[Future], Optional[Future]]]:
+        """
+        Send the AST parses to the component pool, then prepare the text side
+        of a new reference while they run.
+        
+        Returns:
+            (reference, (generated_job, reference_job)); a job is None when
+            there is nothing to parse
+        """
+        prepared = reference if isinstance(reference, PreparedReference) else \
+            self._cached_reference(reference, language)
+        if prepared is not None and prepared.ast_profile is None:
+            return prepared, (None, None)  # no grammar for this language
         
-        # Normalize whitespace
-        lines = [line.strip() for line in code.split('\n') if line.strip()]
-        return '\n'.join(lines)
+        pool = _component_pool(self.parallel)
+        language = prepared.language if prepared is not None else language
+        generated_job = pool.submit(_safe_subtree_profile, generated_code, language)
+        reference_job = None
+        if prepared is None:
+            reference_job = pool.submit(_safe_subtree_profile, reference, language)
+            with CODEBLEU_STAGE.time(stage="prepare_reference"):
+                prepared = PreparedReference(self, reference, language, parse_ast=False)
+        return prepared, (generated_job, reference_job)
     
-    def _calculate_bleu(self, generated: str, reference: str) -> float:
+    def _collect_ast_jobs(self, reference: PreparedReference, generated_job: Optional[Future],
+                          reference_job: Optional[Future]) -> Optional[float]:
+        """Wait for the AST parses; returns the AST match, or None to fall back to syntax match."""
+        if reference_job is not None:
+            reference.ast_profile = reference_job.result()
+            self._remember_reference(reference)
+        if generated_job is None or reference.ast_profile is None:
+            return None
+        generated_profile = generated_job.result()
+        if generated_profile is None:
+            return None
+        return subtree_match(generated_profile, reference.ast_profile)
+    
+    def evaluate_batch(self, pairs: Union[str, Iterable[Any]], language: str = "python",
+                       workers: Optional[int] = None, chunk_size: int = 64) -> Iterator[Dict[str, Any]]:
+        """
+        Evaluate many (generated, reference) pairs, yielding results in input order.
+        
+        Args:
+            pairs: JSONL path, or iterable of dicts (generated_code, reference_code,
+                   optional language and id) or (generated, reference) tuples
+            language: Default language for pairs that don't specify one
+            workers: Worker processes (None = CPU count, 0 or 1 = run in-process)
+            chunk_size: Number of pairs sent to a worker at a time
+        
+        Yields:
+            Per-pair evaluation dictionaries with an added "id" key
+        """
+        for result, _ in self._iter_batch(pairs, language, workers, chunk_size):
+            yield result
+    
+    def evaluate_corpus(self, pairs: Union[str, Iterable[Any]], language: str = "python",
+                        workers: Optional[int] = None, chunk_size: int = 64,
+                        output_path: Optional[str] = None) -> Dict[str, float]:
         """
-        Calculate BLEU score between generated and reference code.
-        Simplified version focusing on token overlap.
+        Evaluate a whole corpus and report corpus-level metrics.
+        
+        Args:
+            pairs: JSONL path or iterable of pairs (see evaluate_batch)
+            language: Default language for pairs that don't specify one
+            workers: Worker processes (None = CPU count, 0 or 1 = run in-process)
+            chunk_size: Number of pairs sent to a worker at a time
+            output_path: Optional JSONL file to stream per-pair results into
+        
+        Returns:
+            Dictionary with corpus BLEU, mean component scores and correctness rate
         """
+        totals = Counter()
+        corpus_stats = [0] * 10
+        count = 0
+        out = open(output_path, 'w', encoding='utf-8') if output_path else None
         try:
-            from nltk.translate.bleu_score import sentence_bleu
-            from nltk.tokenize import word_tokenize
-            
-            gen_tokens = word_tokenize(generated.lower())
-            ref_tokens = word_tokenize(reference.lower())
-            
-            # Calculate BLEU-4
-            score = sentence_bleu([ref_tokens], gen_tokens, weights=(0.25, 0.25, 0.25, 0.25))
-            return float(score)
-        except:
-            # Fallback: simple token overlap
-            gen_tokens = set(generated.lower().split())
-            ref_tokens = set(reference.lower().split())
-            
-            if not ref_tokens:
-                return 0.0
-            
-            overlap = len(gen_tokens & ref_tokens)
-            return overlap / len(ref_tokens) if ref_tokens else 0.0
+            for result, stats in self._iter_batch(pairs, language, workers, chunk_size):
+                count += 1
+                corpus_stats = [a + b for a, b in zip(corpus_stats, stats)]
+                for key in ("codebleu", "bleu", "syntax_match", "dataflow_match", "ast_match"):
+                    totals[key] += result[key]
+                totals["correct"] += int(result["is_correct"])
+                if out:
+                    out.write(json.dumps(result) + "\n")
+        finally:
+            if out:
+                out.close()
+        
+        summary = {"pairs": count, "corpus_bleu": bleu_from_stats(corpus_stats)}
+        for key in ("codebleu", "bleu", "syntax_match", "dataflow_match", "ast_match"):
+            summary[f"mean_{key}"] = totals[key] / count if count else 0.0
+        summary["correct"] = totals["correct"]
+        summary["accuracy"] = totals["correct"] / count if count else 0.0
+        return summary
+    
+    def _iter_batch(self, pairs, language, workers, chunk_size):
+        """Yield (result, bleu_stats) per pair, fanning chunks out to worker processes."""
+        items = _iter_pairs(pairs, language)
+        
+        def chunks():
+            while True:
+                chunk = list(islice(items, chunk_size))
+                if not chunk:
+                    return
+                yield chunk
+        
+        def emit(chunk, scored):
+            for (pair_id, _, _, _), (result, stats) in zip(chunk, scored):
+                yield dict(result, id=pair_id), stats
+        
+        if workers is not None and workers <= 1:
+            for chunk in chunks():
+                scored = [self._evaluate_with_stats(gen, ref, lang) for _, gen, ref, lang in chunk]
+                yield from emit(chunk, scored)
+            return
+        
+        # Keep a bounded number of chunks in flight so huge corpora stream through
+        workers = workers or os.cpu_count() or 1
+        # Workers score with this evaluator's settings, not the defaults; each
+        # worker scores its pairs one after another (parallel=None)
+        config = {"bleu_smoothing": self.bleu_smoothing}
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(type(self), config)) as executor:
+            max_pending = 2 * workers
+            pending = []
+            for chunk in chunks():
+                payload = [(gen, ref, lang) for _, gen, ref, lang in chunk]
+                pending.append((chunk, executor.submit(_evaluate_chunk, payload)))
+                if len(pending) >= max_pending:
+                    done_chunk, future = pending.pop(0)
+                    yield from emit(done_chunk, future.result())
+            for done_chunk, future in pending:
+                yield from emit(done_chunk, future.result())
+    
+    def _lex(self, code: str, language: str) -> LexedCode:
+        """Run the language's precompiled lexer over code."""
+        return get_lexer(language).lex(code)
+    
+    def _normalize_code(self, code: str, language: Optional[str] = None) -> str:
+        """Normalize code by removing extra whitespace and comments."""
+        # Without a language every common comment style is removed
+        return self._lex(code, language or "generic").normalized
+    
+    def _calculate_bleu(self, generated: str, reference: str) -> float:
+        """Calculate smoothed BLEU-4 between generated and reference code."""
+        gen_tokens = self._bleu_tokenize(generated)
+        ref_tokens = self._bleu_tokenize(reference)
+        stats = bleu_stats(gen_tokens, ngram_counts(ref_tokens), len(ref_tokens))
+        return bleu_from_stats(stats, self.bleu_smoothing)
+    
+    def _bleu_tokenize(self, code: str) -> List[str]:
+        """Split code into identifier, number, operator and punctuation tokens."""
+        return tokenize_code(code)
     
     def _syntax_match_score(self, generated: str, reference: str, language: str) -> float:
         """
@@ -126,50 +428,20 @@ class CodeBLEUEvaluator:
         # Extract keywords and structure elements
         gen_keywords = self._extract_keywords(generated, language)
         ref_keywords = self._extract_keywords(reference, language)
+        return self._set_match(gen_keywords, ref_keywords)
+    
+    def _set_match(self, generated: set, reference: set) -> float:
+        """Fraction of reference items present in generated (1.0 if both are empty)."""
+        if not reference:
+            return 1.0 if not generated else 0.0
         
-        if not ref_keywords:
-            return 1.0 if not gen_keywords else 0.0
-        
-        overlap = len(gen_keywords & ref_keywords)
-        return overlap / len(ref_keywords)
+        overlap = len(generated & reference)
+        return overlap / len(reference)
     
     def _extract_keywords(self, code: str, language: str) -> set:
-        """Extract language-specific keywords from code."""
-        # Common keywords across languages
-        common_keywords = {
-            'def', 'class', 'if', 'else', 'for', 'while', 'return', 'import',
-            'public', 'private', 'static', 'void', 'int', 'string', 'bool',
-            'function', 'var', 'let', 'const', 'async', 'await'
-        }
-        
-        # Language-specific patterns
-        if language == "python":
-            keywords = {'def', 'class', 'if', 'elif', 'else', 'for', 'while', 
-                       'return', 'import', 'from', 'try', 'except', 'with', 'as'}
-        elif language in ["java", "cpp"]:
-            keywords = {'public', 'private', 'protected', 'static', 'void', 'int', 
-                       'string', 'class', 'if', 'else', 'for', 'while', 'return'}
-        else:
-            keywords = common_keywords
-        
-        code_lower = code.lower()
-        found_keywords = {kw for kw in keywords if kw in code_lower}
-        
-        # Also extract function/class names
-        if language == "python":
-            func_pattern = r'def\s+(\w+)'
-            class_pattern = r'class\s+(\w+)'
-        elif language in ["java", "cpp"]:
-            func_pattern = r'(\w+)\s*\([^)]*\)\s*\{'
-            class_pattern = r'class\s+(\w+)'
-        else:
-            func_pattern = r'function\s+(\w+)'
-            class_pattern = r'class\s+(\w+)'
-        
-        functions = set(re.findall(func_pattern, code))
-        classes = set(re.findall(class_pattern, code))
-        
-        return found_keywords | functions | classes
+        """Extract language-specific keywords (whole words) and function/class names from code."""
+        lexed = self._lex(code, language)
+        return lexed.keywords | lexed.definitions
     
     def _dataflow_match_score(self, generated: str, reference: str, language: str) -> float:
         """
@@ -178,41 +450,26 @@ class CodeBLEUEvaluator:
         """
         gen_vars = self._extract_variables(generated, language)
         ref_vars = self._extract_variables(reference, language)
-        
-        if not ref_vars:
-            return 1.0 if not gen_vars else 0.0
-        
-        overlap = len(gen_vars & ref_vars)
-        return overlap / len(ref_vars) if ref_vars else 0.0
+        return self._set_match(gen_vars, ref_vars)
     
     def _extract_variables(self, code: str, language: str) -> set:
-        """Extract variable names from code."""
-        # Simple pattern matching for variable assignments
-        if language == "python":
-            pattern = r'(\w+)\s*='
-        elif language in ["java", "cpp"]:
-            pattern = r'(?:int|string|float|double|bool|char)\s+(\w+)\s*='
-        else:
-            pattern = r'(\w+)\s*='
-        
-        variables = set(re.findall(pattern, code))
-        return variables
+        """Extract assigned variable names from code."""
+        return self._lex(code, language).assignments
     
     def _ast_match_score(self, generated: str, reference: str, language: str) -> float:
         """
         Calculate AST (Abstract Syntax Tree) match score.
-        Simplified version using tree-sitter if available, otherwise fallback.
+        Counts the reference's tree-sitter subtrees that also appear in the
+        generated code; falls back to syntax match when no grammar is available.
         """
         try:
-            from tree_sitter import Language, Parser
-            
-            # Try to use tree-sitter for AST comparison
-            # This is a simplified version - full implementation would require
-            # proper AST parsing and comparison
-            return self._syntax_match_score(generated, reference, language)
-        except:
-            # Fallback to syntax match
-            return self._syntax_match_score(generated, reference, language)
+            ref_profile = subtree_profile(reference, language)
+            if ref_profile is not None:
+                return subtree_match(subtree_profile(generated, language), ref_profile)
+        except Exception:
+            pass
+        # Fallback to syntax match
+        return self._syntax_match_score(generated, reference, language)
     
     def get_evaluation_report(self, generated_code: str, reference_code: str, 
                              language: str = "python") -> str:
@@ -227,9 +484,20 @@ class CodeBLEUEvaluator:
         Returns:
             Formatted report string
         """
-        results = self.evaluate(generated_code, reference_code, language)
-        
-        report = f"""
+        return format_evaluation_report(self.evaluate(generated_code, reference_code, language))
+
+
+def format_evaluation_report(results: Dict[str, Any]) -> str:
+    """
+    Format an evaluate() result as a report, without scoring the pair again.
+    
+    Args:
+        results: Dictionary returned by CodeBLEUEvaluator.evaluate
+    
+    Returns:
+        Formatted report string
+    """
+    report = f"""
 CodeBLEU Evaluation Report
 ==========================
 Overall CodeBLEU Score: {results['codebleu']:.4f}
@@ -243,5 +511,4 @@ Component Scores:
 
 Threshold: Code is considered correct if CodeBLEU >= 0.75
 """
-        return report
-
+    return report
@@ -4,10 +4,20 @@ Generates code based on user queries and returns ONLY code (no explanations)
 Uses Mistral AI's Codestral API - optimized for code generation
 """
 
-import re
 import os
-from typing import Optional, Dict
-from mistralai import Mistral
+import sys
+import json
+from typing import Optional, Dict, List, Sequence, Tuple, Union
+from response_cache import ResponseCache, make_cache_key
+
+# Puts llm_common/ (at the repository root) on sys.path
+import shared_modules  # noqa: F401
+from llm_common import metrics
+from llm_common.code_fence import extract_code
+from llm_common.generation import CODE_STOP_SEQUENCES, output_token_budget, stop_cut_before_code
+
+# mistralai and asyncio are imported on first use: together they take most of
+# the CLI's startup time, and a cache hit needs neither
 
 # Try to load from .env file if available
 try:
@@ -16,6 +26,13 @@ try:
 except ImportError:
     pass  # python-dotenv is optional
 
+# Label for the shared metrics
+SERVICE = "codeai"
+
+# Upper bound for a response's max_tokens; each request gets a budget sized
+# from the query and language, and the cap only when that budget runs out
+DEFAULT_MAX_TOKENS = int(os.getenv("CODEAI_MAX_TOKENS", "4000"))
+
 
 class CodeGenerator:
     """
@@ -24,63 +41,104 @@ class CodeGenerator:
     Uses Mistral AI's Codestral - a specialized code generation model.
     """
     
-    def __init__(self, api_key: Optional[str] = None, model: str = "codestral-latest"):
+    def __init__(self, api_key: Optional[str] = None, model: str = "codestral-latest",
+                 cache: Optional[ResponseCache] = None,
+                 requests_per_second: Optional[float] = None, max_retries: int = 3,
+                 max_tokens: int = DEFAULT_MAX_TOKENS):
         """
         Initialize the code generator.
         
         Args:
             api_key: Mistral API key. If None, will try to get from environment.
-            model: Model to use for code generation (default: codestral-latest)
-                   Options: codestral-latest, codestral-mamba-latest
+            model: Default model for code generation (default: codestral-latest)
+                   Options: codestral-latest, codestral-mamba-latest.
+                   Each call can pick another model without a new client.
+            cache: Optional response cache (MemoryCache, SQLiteCache) keyed by
+                   the full request payload
+            requests_per_second: Rate limit for the async API (token bucket).
+                   Defaults to MISTRAL_REQUESTS_PER_SECOND, or no limit.
+            max_retries: Retries for 429/5xx responses in the async API
+            max_tokens: Cap on output tokens per response (CODEAI_MAX_TOKENS).
+                   Requests start with a smaller budget sized from the query
+                   and are repeated with the cap if they run out.
         """
         api_key = api_key or os.getenv("MISTRAL_API_KEY")
         if not api_key:
             raise ValueError("Mistral API key required. Set MISTRAL_API_KEY environment variable or pass api_key parameter.")
         
-        self.client = Mistral(api_key=api_key)
+        self._api_key = api_key
+        # MISTRAL_SERVER_URL points the client at a proxy or local stub
+        self._server_url = os.getenv("MISTRAL_SERVER_URL") or None
+        # Explicitly assigned client (e.g. a stub); None uses the shared pool
+        self._client = None
         self.model = model
+        self.cache = cache
+        
+        if requests_per_second is None and os.getenv("MISTRAL_REQUESTS_PER_SECOND"):
+            requests_per_second = float(os.getenv("MISTRAL_REQUESTS_PER_SECOND"))
+        self.rate_limiter = None
+        if requests_per_second:
+            from rate_limit import TokenBucket
+            self.rate_limiter = TokenBucket(requests_per_second)
+        self.max_retries = max_retries
+        self.max_tokens = max_tokens
+        # Whether the API accepts n (several completions per request); None
+        # until the first generate_samples call finds out
+        self.supports_n: Optional[bool] = None
     
-    def generate_code(self, query: str, language: Optional[str] = None) -> str:
+    @property
+    def client(self):
+        """
+        Mistral client for synchronous calls. Unless one was assigned, this is
+        the process-wide pooled client (see mistral_pool), looked up on first
+        API call since importing mistralai is slow.
+        """
+        if self._client is not None:
+            return self._client
+        from mistral_pool import get_client
+        return get_client(self._api_key, self._server_url)
+    
+    @client.setter
+    def client(self, client):
+        self._client = client
+    
+    def _async_client(self):
+        """Mistral client for async calls, pooled per running event loop."""
+        if self._client is not None:
+            return self._client
+        from mistral_pool import get_async_client
+        return get_async_client(self._api_key, self._server_url)
+    
+    def generate_code(self, query: str, language: Optional[str] = None,
+                      use_cache: bool = True, model: Optional[str] = None) -> str:
         """
         Generate code based on user query.
         
         Args:
             query: User's code generation request
             language: Target programming language (python, cpp, java, etc.)
+            use_cache: Set to False to bypass the response cache for this call
+            model: Model for this call (default: the generator's model)
         
         Returns:
             Pure code string without any explanations or markdown
         """
-        # Determine language from query if not specified
-        if not language:
-            language = self._detect_language(query)
+        request, language = self._build_request(query, language, model)
         
-        # Create prompt that emphasizes code-only output
-        prompt = self._create_prompt(query, language)
+        # Serve identical requests from the cache when one is configured
+        cache = self.cache if use_cache else None
+        if cache is not None:
+            cache_key = make_cache_key(request)
+            cached_text = self._cached_text(cache, cache_key)
+            if cached_text is not None:
+                return self._extract_code(cached_text, language)
         
         try:
             # Use Mistral AI's chat completion API
-            chat_response = self.client.chat.complete(
-                model=self.model,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "You are a code generation agent. You MUST respond with ONLY code. No explanations, no markdown formatting, no comments about the code. Just pure code. If the user asks for a specific file type, provide only that code."
-                    },
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ],
-                temperature=0.2,  # Lower temperature for more deterministic code
-                max_tokens=4000
-            )
+            generated_text = self._response_text(self._complete(request, language))
             
-            # Extract response content
-            if hasattr(chat_response, 'choices') and len(chat_response.choices) > 0:
-                generated_text = chat_response.choices[0].message.content.strip()
-            else:
-                raise Exception("Invalid response format from Mistral API")
+            if cache is not None:
+                cache.set(cache_key, generated_text)
             
             # Extract code from response (remove markdown code blocks if present)
             code = self._extract_code(generated_text, language)
@@ -92,6 +150,292 @@ class CodeGenerator:
         except Exception as e:
             raise Exception(f"Error generating code: {str(e)}")
     
+    async def agenerate_code(self, query: str, language: Optional[str] = None,
+                             use_cache: bool = True, model: Optional[str] = None) -> str:
+        """
+        Async version of generate_code using Mistral's async client.
+        
+        Waits for the rate limiter before each API call and retries 429 and
+        5xx responses with jittered exponential backoff.
+        
+        Args:
+            query: User's code generation request
+            language: Target programming language (python, cpp, java, etc.)
+            use_cache: Set to False to bypass the response cache for this call
+            model: Model for this call (default: the generator's model)
+        
+        Returns:
+            Pure code string without any explanations or markdown
+        """
+        request, language = self._build_request(query, language, model)
+        
+        cache = self.cache if use_cache else None
+        if cache is not None:
+            cache_key = make_cache_key(request)
+            cached_text = self._cached_text(cache, cache_key)
+            if cached_text is not None:
+                return self._extract_code(cached_text, language)
+        
+        generated_text = self._response_text(await self._acomplete(request, language))
+        
+        if cache is not None:
+            cache.set(cache_key, generated_text)
+        return self._extract_code(generated_text, language)
+    
+    async def agenerate_many(self, queries: Sequence[Union[str, Tuple[str, Optional[str]]]],
+                             language: Optional[str] = None, max_concurrency: int = 4,
+                             use_cache: bool = True, model: Optional[str] = None) -> List[str]:
+        """
+        Generate code for several queries concurrently.
+        
+        Args:
+            queries: Query strings, or (query, language) tuples
+            language: Target language for plain query strings
+            max_concurrency: Maximum number of requests in flight
+            use_cache: Set to False to bypass the response cache
+            model: Model for these calls (default: the generator's model)
+        
+        Returns:
+            Generated code, in the same order as queries
+        """
+        import asyncio
+        semaphore = asyncio.Semaphore(max(1, max_concurrency))
+        
+        async def run(item):
+            query, item_language = (item, language) if isinstance(item, str) else item
+            async with semaphore:
+                return await self.agenerate_code(query, item_language, use_cache=use_cache,
+                                                 model=model)
+        
+        return list(await asyncio.gather(*(run(item) for item in queries)))
+    
+    def generate_many(self, queries: Sequence[Union[str, Tuple[str, Optional[str]]]],
+                      language: Optional[str] = None, max_concurrency: int = 4,
+                      use_cache: bool = True, model: Optional[str] = None) -> List[str]:
+        """
+        Blocking wrapper around agenerate_many for synchronous callers.
+        Wall-clock time is roughly latency x len(queries) / max_concurrency.
+        
+        Args:
+            queries: Query strings, or (query, language) tuples
+            language: Target language for plain query strings
+            max_concurrency: Maximum number of requests in flight
+            use_cache: Set to False to bypass the response cache
+            model: Model for these calls (default: the generator's model)
+        
+        Returns:
+            Generated code, in the same order as queries
+        """
+        import asyncio
+        from mistral_pool import aclose_loop
+        
+        async def run():
+            try:
+                return await self.agenerate_many(queries, language=language,
+                                                 max_concurrency=max_concurrency,
+                                                 use_cache=use_cache, model=model)
+            finally:
+                # This loop's connections can't be reused once asyncio.run returns
+                await aclose_loop()
+        
+        return asyncio.run(run())
+    
+    def generate_samples(self, query: str, n: int = 5, language: Optional[str] = None,
+                         temperature: float = 0.8, use_cache: bool = True,
+                         model: Optional[str] = None, max_concurrency: int = 4) -> List[str]:
+        """
+        Generate n independent samples for one query.
+        
+        The samples are requested in a single API call (Mistral's n), so the
+        prompt is sent and billed once. If the API rejects n or returns fewer
+        completions, the rest are requested concurrently.
+        
+        Args:
+            query: User's code generation request
+            n: Number of samples
+            language: Target programming language (python, cpp, java, etc.)
+            temperature: Sampling temperature; samples need some randomness
+            use_cache: Set to False to bypass the response cache for this call
+            model: Model for this call (default: the generator's model)
+            max_concurrency: Requests in flight when falling back to one
+                   request per sample
+        
+        Returns:
+            n code strings (duplicates included, see sampling.group_samples)
+        """
+        request, language = self._build_request(query, language, model)
+        request["temperature"] = temperature
+        
+        cache = self.cache if use_cache else None
+        if cache is not None:
+            cache_key = make_cache_key({**request, "n": n})
+            cached_text = self._cached_text(cache, cache_key)
+            if cached_text is not None:
+                return [self._extract_code(text, language) for text in json.loads(cached_text)]
+        
+        texts: List[str] = []
+        if n > 1 and self.supports_n is not False:
+            try:
+                texts = self._response_texts(self._complete({**request, "n": n}, language))
+                self.supports_n = True
+            except ImportError as e:
+                raise Exception(f"Mistral AI SDK not installed. Install with: pip install mistralai. Error: {str(e)}")
+            except Exception as e:
+                from rate_limit import error_status
+                # 400/422: the API doesn't take n; anything else is a real failure
+                if error_status(e) not in (400, 422):
+                    raise Exception(f"Error generating code: {str(e)}")
+                self.supports_n = False
+        if len(texts) < n:
+            texts += self._complete_many(request, language, n - len(texts), max_concurrency)
+        
+        if cache is not None:
+            cache.set(cache_key, json.dumps(texts))
+        return [self._extract_code(text, language) for text in texts]
+    
+    def _complete_many(self, request: Dict, language: str, count: int,
+                       max_concurrency: int) -> List[str]:
+        """Send the same request count times concurrently; returns the response texts."""
+        import asyncio
+        from mistral_pool import aclose_loop
+        
+        async def run():
+            semaphore = asyncio.Semaphore(max(1, max_concurrency))
+            
+            async def one():
+                async with semaphore:
+                    return self._response_text(await self._acomplete(request, language))
+            
+            try:
+                return await asyncio.gather(*(one() for _ in range(count)))
+            finally:
+                await aclose_loop()
+        
+        return list(asyncio.run(run()))
+    
+    def _complete(self, request: Dict, language: str):
+        """
+        One chat completion, repeated with the full max_tokens if the
+        response ran out of its adaptive budget, or without stop sequences
+        if they cut it before the code.
+        """
+        with metrics.track_llm_call(SERVICE, request["model"]):
+            chat_response = self.client.chat.complete(**request)
+        self._record_usage(chat_response, request["model"])
+        if self._hit_budget(chat_response, request):
+            return self._complete({**request, "max_tokens": self.max_tokens}, language)
+        if self._stopped_before_code(chat_response, request, language):
+            return self._complete(_without_stop(request), language)
+        return chat_response
+    
+    async def _acomplete(self, request: Dict, language: str):
+        """
+        One async chat completion. Waits for the rate limiter, retries 429
+        and 5xx responses with jittered exponential backoff, and repeats the
+        request with the full max_tokens if it ran out of its budget, or
+        without stop sequences if they cut it before the code.
+        """
+        import asyncio
+        from rate_limit import backoff_delay, is_retryable
+        
+        attempt = 0
+        while True:
+            if self.rate_limiter is not None:
+                await self.rate_limiter.acquire()
+            try:
+                with metrics.track_llm_call(SERVICE, request["model"]):
+                    chat_response = await self._async_client().chat.complete_async(**request)
+                self._record_usage(chat_response, request["model"])
+                break
+            except Exception as e:
+                if attempt < self.max_retries and is_retryable(e):
+                    await asyncio.sleep(backoff_delay(attempt, e))
+                    attempt += 1
+                    continue
+                raise Exception(f"Error generating code: {str(e)}")
+        if self._hit_budget(chat_response, request):
+            return await self._acomplete({**request, "max_tokens": self.max_tokens}, language)
+        if self._stopped_before_code(chat_response, request, language):
+            return await self._acomplete(_without_stop(request), language)
+        return chat_response
+    
+    def _hit_budget(self, chat_response, request: Dict) -> bool:
+        """True if a choice stopped at a max_tokens below the cap (counted as a retry)."""
+        if request["max_tokens"] >= self.max_tokens:
+            return False
+        choices = getattr(chat_response, 'choices', None) or []
+        if not any(getattr(choice, 'finish_reason', None) == "length" for choice in choices):
+            return False
+        metrics.LLM_BUDGET_RETRIES.inc(service=SERVICE, model=request["model"])
+        return True
+    
+    def _stopped_before_code(self, chat_response, request: Dict, language: str) -> bool:
+        """True if the stop sequence ended a choice before its code block (counted as a retry)."""
+        if "stop" not in request:
+            return False
+        choices = getattr(chat_response, 'choices', None) or []
+        if not any(getattr(choice, 'finish_reason', None) == "stop" and choice.message is not None
+                   and stop_cut_before_code(choice.message.content or "", language)
+                   for choice in choices):
+            return False
+        metrics.LLM_STOP_RETRIES.inc(service=SERVICE, model=request["model"])
+        return True
+    
+    def _build_request(self, query: str, language: Optional[str],
+                       model: Optional[str] = None) -> Tuple[Dict, str]:
+        """Build the chat completion request for a query; returns (request, language)."""
+        # Determine language from query if not specified
+        if not language:
+            language = self._detect_language(query)
+        
+        # Create prompt that emphasizes code-only output
+        prompt = self._create_prompt(query, language)
+        request = {
+            "model": model or self.model,
+            "messages": [
+                {
+                    "role": "system",
+                    "content": "You are a code generation agent. You MUST respond with ONLY code, in a single markdown code block tagged with the language (for example ```python). No explanations and no comments about the code outside the block. If the user asks for a specific file type, provide only that code."
+                },
+                {
+                    "role": "user",
+                    "content": prompt
+                }
+            ],
+            "temperature": 0.2,  # Lower temperature for more deterministic code
+            "max_tokens": output_token_budget(query, language, self.max_tokens),
+            # Stop at the end of the code block instead of paying for trailing
+            # prose; the system message asks for the tagged block this relies on
+            "stop": list(CODE_STOP_SEQUENCES)
+        }
+        return request, language
+    
+    def _cached_text(self, cache: ResponseCache, cache_key: str) -> Optional[str]:
+        """Look up a cached response, counting the hit or miss."""
+        cached_text = cache.get(cache_key)
+        metrics.CACHE_REQUESTS.inc(cache="codeai-response",
+                                   result="miss" if cached_text is None else "hit")
+        return cached_text
+    
+    def _record_usage(self, chat_response, model: str):
+        """Record the token usage reported with a chat completion."""
+        usage = getattr(chat_response, "usage", None)
+        if usage is not None:
+            metrics.record_tokens(SERVICE, model, getattr(usage, "prompt_tokens", None),
+                                  getattr(usage, "completion_tokens", None))
+    
+    def _response_text(self, chat_response) -> str:
+        """Extract the generated text from a chat completion response."""
+        if hasattr(chat_response, 'choices') and len(chat_response.choices) > 0:
+            return chat_response.choices[0].message.content.strip()
+        raise Exception("Invalid response format from Mistral API")
+    
+    def _response_texts(self, chat_response) -> List[str]:
+        """Generated text of every choice in a chat completion response."""
+        choices = getattr(chat_response, 'choices', None) or []
+        return [choice.message.content.strip() for choice in choices
+                if choice.message is not None and choice.message.content]
+    
     def _create_prompt(self, query: str, language: str) -> str:
         """Create a prompt that emphasizes code-only output."""
         lang_instruction = f"Generate {language} code" if language else "Generate code"
@@ -122,21 +466,8 @@ class CodeGenerator:
         """
         Extract pure code from response, removing markdown code blocks.
         """
-        # Remove markdown code blocks (```language ... ```)
-        patterns = [
-            rf'```{language}\s*\n(.*?)\n```',
-            rf'```\s*\n(.*?)\n```',
-            rf'```{language}(.*?)```',
-            rf'```(.*?)```'
-        ]
-        
-        for pattern in patterns:
-            matches = re.findall(pattern, text, re.DOTALL)
-            if matches:
-                return matches[0].strip()
-        
-        # If no code blocks found, return the text as-is (assuming it's already code)
-        return text.strip()
+        with metrics.CODE_EXTRACTION.time(service=SERVICE):
+            return extract_code(text, language)
     
     def generate_code_file(self, query: str, language: Optional[str] = None, filename: Optional[str] = None) -> str:
         """
@@ -157,3 +488,7 @@ class CodeGenerator:
         
         return code
 
+
+def _without_stop(request: Dict) -> Dict:
+    """The request without its stop sequences."""
+    return {key: value for key, value in request.items() if key != "stop"}
@@ -0,0 +1,127 @@
+"""
+Code Lexer
+Language-aware feature extraction for the CodeBLEU evaluator, compiled once per language
+"""
+
+import re
+from functools import lru_cache
+from typing import NamedTuple
+
+# Keywords counted by the syntax match, per language
+PYTHON_KEYWORDS = (
+    'def', 'class', 'if', 'elif', 'else', 'for', 'while',
+    'return', 'import', 'from', 'try', 'except', 'with', 'as'
+)
+C_FAMILY_KEYWORDS = (
+    'public', 'private', 'protected', 'static', 'void', 'int',
+    'string', 'class', 'if', 'else', 'for', 'while', 'return'
+)
+COMMON_KEYWORDS = (
+    'def', 'class', 'if', 'else', 'for', 'while', 'return', 'import',
+    'public', 'private', 'static', 'void', 'int', 'string', 'bool',
+    'function', 'var', 'let', 'const', 'async', 'await'
+)
+
+# Statements that look like "name(...) {" but are not function definitions
+C_FAMILY_CONTROL = frozenset({'if', 'for', 'while', 'switch', 'catch', 'return', 'sizeof', 'synchronized'})
+
+# Declared types that mark an assignment target in Java/C++
+C_FAMILY_TYPES = ('int', 'string', 'float', 'double', 'bool', 'char')
+
+C_FAMILY = ("java", "cpp")
+SLASH_COMMENT_LANGUAGES = ("java", "cpp", "javascript", "typescript", "go", "rust")
+
+
+def _word(word: str) -> str:
+    """
+    Regex matching word as a whole word. The boundary check comes after the
+    literal so the regex engine can still scan ahead for the literal.
+    """
+    return rf'{word}\b(?<!\w{word})'
+
+
+class LexedCode(NamedTuple):
+    """Features extracted from one piece of code."""
+    normalized: str     # Comments removed, lines stripped, blank lines dropped
+    keywords: set       # Language keywords that occur as whole words
+    definitions: set    # Function and class names
+    assignments: set    # Assignment targets
+
+
+class CodeLexer:
+    """
+    Precompiled lexer for one language. Use get_lexer(language) to share instances.
+
+    Every pattern starts with a literal (a keyword, "=", "{" or a comment
+    marker) so the regex engine skips ahead instead of trying a match at
+    each position. Patterns that need the word *before* a marker ("x =",
+    "name(...) {") run over the reversed text for the same reason.
+    """
+
+    def __init__(self, language: str):
+        self.language = language
+
+        if language == "python":
+            self.comment_markers = ('#',)
+            comments = r'#[^\n]*'
+        elif language in SLASH_COMMENT_LANGUAGES:
+            self.comment_markers = ('//', '/*')
+            comments = r'//[^\n]*|/\*[\s\S]*?\*/'
+        else:
+            # Unknown language: strip every common comment style
+            self.comment_markers = ('#', '//', '/*')
+            comments = r'#[^\n]*|//[^\n]*|/\*[\s\S]*?\*/'
+        self.comment_pattern = re.compile(comments)
+
+        if language == "python":
+            keywords, definers = PYTHON_KEYWORDS, ('def', 'class')
+        elif language in C_FAMILY:
+            keywords, definers = C_FAMILY_KEYWORDS, ('class',)
+        else:
+            keywords, definers = COMMON_KEYWORDS, ('function', 'class')
+        self.keyword_patterns = [(kw, re.compile(_word(kw))) for kw in keywords]
+        self.definition_pattern = re.compile(
+            '(?:' + '|'.join(_word(d) for d in definers) + r')\s+(\w+)'
+        )
+
+        if language in C_FAMILY:
+            # Reversed "name(...) {"
+            self.function_pattern = re.compile(r'\{\s*\)[^()]*\(\s*(\w+)')
+            types = '|'.join(_word(t) for t in C_FAMILY_TYPES)
+            self.assignment_pattern = re.compile(rf'(?:{types})\s+(\w+)\s*=(?![=>])')
+            self.reversed_assignment_pattern = None
+        else:
+            self.function_pattern = None
+            self.assignment_pattern = None
+            # Reversed "name =" (but not ==, <=, >=, !=, =>)
+            self.reversed_assignment_pattern = re.compile(r'=(?<![=>]=)\s*(\w+)')
+
+    def lex(self, code: str) -> LexedCode:
+        """Normalize code and extract its keyword, definition and assignment features."""
+        if any(marker in code for marker in self.comment_markers):
+            code = self.comment_pattern.sub('', code)
+        normalized = '\n'.join(line.strip() for line in code.split('\n') if line.strip())
+
+        lowered = normalized.lower()
+        keywords = {kw for kw, pattern in self.keyword_patterns
+                    if kw in lowered and pattern.search(lowered)}
+
+        definitions = set(self.definition_pattern.findall(normalized))
+        reversed_text = normalized[::-1]
+        if self.function_pattern is not None:
+            functions = {name[::-1] for name in self.function_pattern.findall(reversed_text)}
+            definitions |= functions - C_FAMILY_CONTROL
+
+        if self.assignment_pattern is not None:
+            assignments = set(self.assignment_pattern.findall(normalized))
+        else:
+            assignments = {name[::-1] for name in
+                           self.reversed_assignment_pattern.findall(reversed_text)}
+
+        return LexedCode(normalized, keywords, definitions, assignments)
+
+
+@lru_cache(maxsize=None)
+def get_lexer(language: str) -> CodeLexer:
+    """Return the shared, precompiled lexer for language."""
+    return CodeLexer(language)
@@ -0,0 +1,311 @@
+"""
+CodeAI Daemon
+Keeps one AICodeAssistant resident (Mistral connection pool, warm evaluator and caches)
+and serves it over a local Unix socket or localhost HTTP port.
+main.py forwards requests to a running daemon instead of starting from scratch.
+"""
+
+import hmac
+import http.client
+import json
+import os
+import secrets
+import socket
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional, Tuple, Union
+
+# Puts llm_common/ (at the repository root) on sys.path
+import shared_modules  # noqa: F401
+from llm_common import metrics
+
+DEFAULT_TCP_ADDRESS = "127.0.0.1:8765"
+DEFAULT_SOCKET = os.path.join(os.path.expanduser("~"), ".cache", "codeai", "daemon.sock")
+LOCAL_HOSTS = {"localhost", "127.0.0.1", "::1"}
+TOKEN_HEADER = "X-CodeAI-Token"
+
+
+def default_address() -> str:
+    """Daemon address from CODEAI_DAEMON, else a Unix socket (TCP on Windows)."""
+    address = os.getenv("CODEAI_DAEMON")
+    if address:
+        return address
+    if os.name == "nt" or not hasattr(socket, "AF_UNIX"):
+        return DEFAULT_TCP_ADDRESS
+    return DEFAULT_SOCKET
+
+
+def token_path(address: Union[str, Tuple[str, int]]) -> str:
+    """File holding the daemon's access token: next to the socket, or per port in ~/.cache/codeai."""
+    if isinstance(address, str):
+        return address + ".token"
+    return os.path.join(os.path.dirname(DEFAULT_SOCKET), f"daemon-{address[1]}.token")
+
+
+def parse_address(address: str) -> Union[str, Tuple[str, int]]:
+    """
+    Parse a daemon address.
+    "host:port" or "http://host:port" is TCP; anything else is a Unix socket path.
+    """
+    if address.startswith("http://"):
+        address = address[len("http://"):].rstrip("/")
+    host, sep, port = address.rpartition(":")
+    if sep and port.isdigit() and "/" not in address:
+        return host or "127.0.0.1", int(port)
+    return address
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "CodeAIDaemon"
+
+    def setup(self):
+        super().setup()
+        if self.server.address_family != socket.AF_UNIX:
+            # Headers and body are separate writes; don't let Nagle delay the body
+            self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, True)
+
+    def log_message(self, format, *args):
+        pass  # the CLI prints results; request logs would be noise
+
+    def _send(self, status: int, payload: Dict[str, Any]):
+        self._send_body(status, json.dumps(payload).encode("utf-8"), "application/json")
+
+    def _send_body(self, status: int, body: bytes, content_type: str):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _refusal(self) -> Optional[str]:
+        """
+        Why a request must be refused, or None.
+        Web pages can reach a localhost port: browsers mark their requests with
+        Origin, and can't POST application/json without a CORS preflight, which
+        this server never answers. A foreign Host means DNS rebinding.
+        """
+        if self.headers.get("Origin") is not None:
+            return "cross-origin requests are not accepted"
+        host = self.headers.get("Host") or ""
+        host = host[1:].partition("]")[0] if host.startswith("[") else host.partition(":")[0]
+        if host not in LOCAL_HOSTS:
+            return f"Host {host or '(missing)'} is not accepted"
+        if self.command == "POST" and self.headers.get_content_type() != "application/json":
+            return "Content-Type must be application/json"
+        token = self.headers.get(TOKEN_HEADER) or ""
+        if not hmac.compare_digest(token.encode("utf-8"), self.server.token.encode("utf-8")):
+            return f"missing or wrong {TOKEN_HEADER}"
+        return None
+
+    def do_GET(self):
+        refusal = self._refusal()
+        if refusal:
+            self._send(403, {"error": refusal})
+            return
+        if self.path == "/health":
+            assistant = self.server.assistant
+            self._send(200, {"status": "ok", "pid": os.getpid(),
+                             "model": assistant.generator.model})
+        elif self.path == "/metrics":
+            self._send_body(200, metrics.render().encode("utf-8"), metrics.CONTENT_TYPE)
+        else:
+            self._send(404, {"error": f"Unknown path {self.path}"})
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        refusal = self._refusal()
+        if refusal:
+            self.rfile.read(length)  # keep the connection usable for the 403
+            self._send(403, {"error": refusal})
+            return
+        try:
+            request = json.loads(self.rfile.read(length) or b"{}")
+            if self.path == "/generate":
+                response = self.server.generate(request)
+            elif self.path == "/evaluate":
+                response = self.server.evaluate(request)
+            elif self.path == "/execute":
+                response = self.server.execute(request)
+            else:
+                self._send(404, {"error": f"Unknown path {self.path}"})
+                return
+        except Exception as e:
+            metrics.ERRORS.inc(service="codeai", operation=self.path.strip("/"))
+            self._send(500, {"error": str(e)})
+            return
+        self._send(200, response)
+
+
+class AssistantServer(ThreadingHTTPServer):
+    """
+    HTTP server around a resident AICodeAssistant.
+
+    Every request must carry the token from token_path(address) in the
+    X-CodeAI-Token header; POSTs must be application/json.
+
+    Endpoints (JSON):
+        GET  /health    -> {"status", "pid", "model"}
+        GET  /metrics   -> Prometheus text (LLM latency/tokens, cache hits, CodeBLEU stages)
+        POST /generate  {"query", "language", "use_cache", "model"} -> {"code"}
+        POST /evaluate  {"generated_code", "reference_code", "language"} -> {"evaluation", "report"}
+        POST /execute   {"generated_code", "tests", "language"} -> {"execution", "report"}
+    """
+
+    daemon_threads = True
+
+    def __init__(self, assistant, address: Union[str, Tuple[str, int]]):
+        self.assistant = assistant
+        # The evaluator's reference LRU is not thread-safe; scoring is CPU-bound anyway
+        self._evaluate_lock = threading.Lock()
+        self.token = secrets.token_urlsafe(32)
+        if isinstance(address, str):
+            self.address_family = socket.AF_UNIX
+            if os.path.exists(address):
+                os.unlink(address)  # stale socket from a previous run
+            os.makedirs(os.path.dirname(address) or ".", exist_ok=True)
+        super().__init__(address, _Handler)
+        self.token_file = token_path(self.server_address)
+        self._write_token()
+
+    def server_bind(self):
+        if self.address_family == socket.AF_UNIX:
+            # HTTPServer.server_bind expects (host, port)
+            self.socket.bind(self.server_address)
+            self.server_address = self.socket.getsockname()
+            self.server_name, self.server_port = "localhost", 0
+        else:
+            super().server_bind()
+
+    def _write_token(self):
+        """Write the token readable by the owner only (created 0600, never widened)."""
+        os.makedirs(os.path.dirname(self.token_file) or ".", exist_ok=True)
+        if os.path.exists(self.token_file):
+            os.unlink(self.token_file)
+        fd = os.open(self.token_file, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        with os.fdopen(fd, "w") as f:
+            f.write(self.token)
+
+    def server_close(self):
+        super().server_close()
+        if self.address_family == socket.AF_UNIX and os.path.exists(self.server_address):
+            os.unlink(self.server_address)
+        if os.path.exists(self.token_file):
+            os.unlink(self.token_file)
+
+    def warm_up(self):
+        """Load the Mistral SDK, evaluator, lexers, tree-sitter parsers and test sandbox before the first request."""
+        self.assistant.generator.client
+        self.assistant.executor
+        sample = "def f(x):\n    y = x + 1\n    return y\n"
+        for language in ("python", "java", "cpp"):
+            self.assistant.evaluate(sample, sample, language)
+
+    def generate(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        code = self.assistant.generate(request["query"], request.get("language"),
+                                       use_cache=request.get("use_cache", True),
+                                       model=request.get("model"))
+        return {"code": code}
+
+    def evaluate(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        from code_evaluator import format_evaluation_report
+        generated, reference = request["generated_code"], request["reference_code"]
+        language = request.get("language") or "python"
+        with self._evaluate_lock:
+            evaluation = self.assistant.evaluate(generated, reference, language)
+        return {"evaluation": evaluation, "report": format_evaluation_report(evaluation)}
+
+    def execute(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        from execution_evaluator import format_execution_report
+        # The sandbox pool is thread-safe: each job borrows an idle worker
+        execution = self.assistant.run_tests(request["generated_code"], request["tests"],
+                                             request.get("language") or "python")
+        return {"execution": execution, "report": format_execution_report(execution)}
+
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, path: str, timeout: Optional[float] = None):
+        super().__init__("localhost", timeout=timeout)
+        self.socket_path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        if self.timeout is not None:
+            self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socket_path)
+
+
+class DaemonClient:
+    """Thin client for a running daemon."""
+
+    def __init__(self, address: Optional[str] = None, timeout: Optional[float] = 300):
+        """
+        Args:
+            address: Socket path or host:port (default: default_address())
+            timeout: Seconds to wait for a response
+        """
+        self.address = parse_address(address or default_address())
+        self.timeout = timeout
+
+    def _token(self) -> str:
+        try:
+            with open(token_path(self.address)) as f:
+                return f.read().strip()
+        except OSError:
+            return ""  # no daemon here, or another user's; the request will say so
+
+    def _connection(self, timeout: Optional[float]):
+        if isinstance(self.address, str):
+            return _UnixHTTPConnection(self.address, timeout=timeout)
+        host, port = self.address
+        return http.client.HTTPConnection(host, port, timeout=timeout)
+
+    def request(self, method: str, path: str, payload: Optional[Dict[str, Any]] = None,
+                timeout: Optional[float] = None) -> Dict[str, Any]:
+        """Send one request; raises ConnectionError if the daemon isn't reachable."""
+        conn = self._connection(timeout if timeout is not None else self.timeout)
+        try:
+            body = json.dumps(payload).encode("utf-8") if payload is not None else None
+            headers = {TOKEN_HEADER: self._token()}
+            if body is not None:
+                headers["Content-Type"] = "application/json"
+            conn.request(method, path, body=body, headers=headers)
+            response = conn.getresponse()
+            data = json.loads(response.read() or b"{}")
+        except (OSError, http.client.HTTPException) as e:
+            raise ConnectionError(f"CodeAI daemon not reachable at {self.address}: {e}")
+        finally:
+            conn.close()
+        if response.status != 200:
+            raise Exception(data.get("error", f"daemon returned HTTP {response.status}"))
+        return data
+
+    def health(self) -> Optional[Dict[str, Any]]:
+        """Daemon status, or None if no daemon is running."""
+        try:
+            return self.request("GET", "/health", timeout=1.0)
+        except Exception:
+            return None
+
+    def generate(self, query: str, language: Optional[str] = None, use_cache: bool = True,
+                 model: Optional[str] = None) -> str:
+        return self.request("POST", "/generate", {
+            "query": query, "language": language, "use_cache": use_cache, "model": model
+        })["code"]
+
+    def evaluate(self, generated_code: str, reference_code: str,
+                 language: str = "python") -> Dict[str, Any]:
+        return self.request("POST", "/evaluate", {
+            "generated_code": generated_code,
+            "reference_code": reference_code,
+            "language": language,
+        })
+
+    def execute(self, generated_code: str, tests: str,
+                language: str = "python") -> Dict[str, Any]:
+        return self.request("POST", "/execute", {
+            "generated_code": generated_code,
+            "tests": tests,
+            "language": language,
+        })
@@ -100,12 +100,17 @@ def example_multiple_languages():
         ("C++", "Create a function to reverse a string", "cpp"),
     ]
     
-    for lang_name, query, lang_code in queries:
+    # Generate all languages concurrently; results come back in query order
+    codes = assistant.generator.generate_many(
+        [(query, lang_code) for _, query, lang_code in queries],
+        max_concurrency=3
+    )
+    
+    for (lang_name, query, _), code in zip(queries, codes):
         print(f"\n{lang_name} Code Generation:")
         print(f"Query: {query}\n")
         print("Generated Code:")
         print("-" * 60)
-        code = assistant.generate(query, language=lang_code)
         print(code)
         print("-" * 60)
 
@@ -0,0 +1,355 @@
+"""
+Execution-based correctness for generated Python code
+Runs generated code against test cases in a pool of warm worker processes
+"""
+
+import atexit
+import json
+import queue
+import subprocess
+import sys
+import threading
+from typing import Any, Dict, List, Optional
+
+# Each worker is a small interpreter started once. On POSIX it forks a fresh
+# child per job, so a job costs a fork (about a millisecond) instead of an
+# interpreter start, and one job cannot affect the next. Limits are applied
+# in the child. This bounds CPU, memory, time and file size but is not a
+# security boundary: run untrusted code inside a container as well.
+WORKER_SOURCE = r'''
+import io, json, os, select, shutil, signal, sys, tempfile, time
+
+MAX_OUTPUT = 4000
+
+
+def describe(error):
+    return f"{type(error).__name__}: {error}"[:500]
+
+
+def limit_resources(job):
+    try:
+        import resource
+    except ImportError:
+        return
+    memory = job["memory_mb"] * 1024 * 1024
+    limits = [
+        (resource.RLIMIT_AS, memory),
+        (resource.RLIMIT_CPU, job["cpu_seconds"]),
+        (resource.RLIMIT_FSIZE, 1024 * 1024),
+        (getattr(resource, "RLIMIT_NPROC", None), 0),
+    ]
+    for which, value in limits:
+        if which is None:
+            continue
+        try:
+            soft, hard = resource.getrlimit(which)
+            if hard != resource.RLIM_INFINITY:
+                value = min(value, hard)
+            resource.setrlimit(which, (value, hard))
+        except (ValueError, OSError):
+            pass
+
+
+def execute(job, emit):
+    """Run the code, then each test; emit() one event per step."""
+    output = io.StringIO()
+    sys.stdout = sys.stderr = output
+    namespace = {"__name__": "solution", "__builtins__": __builtins__}
+    try:
+        exec(compile(job["code"], "<generated>", "exec"), namespace)
+    except BaseException as e:
+        emit({"event": "setup", "error": describe(e), "output": output.getvalue()[:MAX_OUTPUT]})
+        return
+
+    tests = []
+    if job["tests"]:
+        try:
+            before = set(namespace)
+            exec(compile(job["tests"], "<tests>", "exec"), namespace)
+            tests = [name for name in namespace
+                     if name not in before and name.startswith("test") and callable(namespace[name])]
+        except BaseException as e:
+            # Module-level asserts in the test source make one test case
+            emit({"event": "tests", "names": ["tests"]})
+            emit({"event": "test", "name": "tests", "passed": False, "error": describe(e),
+                  "seconds": 0.0})
+            emit({"event": "done", "output": output.getvalue()[:MAX_OUTPUT]})
+            return
+    if not tests and job["tests"]:
+        emit({"event": "tests", "names": ["tests"]})
+        emit({"event": "test", "name": "tests", "passed": True, "error": None, "seconds": 0.0})
+    else:
+        emit({"event": "tests", "names": tests})
+        for name in tests:
+            start = time.perf_counter()
+            try:
+                namespace[name]()
+                error = None
+            except BaseException as e:
+                error = describe(e)
+            emit({"event": "test", "name": name, "passed": error is None, "error": error,
+                  "seconds": time.perf_counter() - start})
+    emit({"event": "done", "output": output.getvalue()[:MAX_OUTPUT]})
+
+
+def run_child(job, write_fd, workdir):
+    devnull = os.open(os.devnull, os.O_RDWR)
+    for fd in (0, 1, 2):
+        os.dup2(devnull, fd)
+    os.chdir(workdir)
+    limit_resources(job)
+    pipe = os.fdopen(write_fd, "w", buffering=1)
+
+    def emit(event):
+        pipe.write(json.dumps(event) + "\n")
+
+    try:
+        execute(job, emit)
+        pipe.flush()
+    finally:
+        os._exit(0)
+
+
+def run_forked(job):
+    """Run a job in a forked child, enforcing the per-step timeout."""
+    workdir = tempfile.mkdtemp(prefix="codeai-exec-")
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        os.close(read_fd)
+        run_child(job, write_fd, workdir)
+    os.close(write_fd)
+    events, buffer, timed_out = [], b"", False
+    deadline = time.monotonic() + job["timeout"]
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0 or not select.select([read_fd], [], [], remaining)[0]:
+            timed_out = True
+            os.kill(pid, signal.SIGKILL)
+            break
+        data = os.read(read_fd, 65536)
+        if not data:
+            break
+        buffer += data
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            events.append(json.loads(line))
+            deadline = time.monotonic() + job["timeout"]
+    os.close(read_fd)
+    _, status = os.waitpid(pid, 0)
+    shutil.rmtree(workdir, ignore_errors=True)
+    return {"events": events, "timed_out": timed_out, "status": os.waitstatus_to_exitcode(status)}
+
+
+def main():
+    for line in sys.stdin:
+        job = json.loads(line)
+        if hasattr(os, "fork"):
+            result = run_forked(job)
+        else:
+            # No fork (Windows): run here; the pool replaces this worker afterwards
+            events = []
+            real_stdout = sys.stdout
+            execute(job, events.append)
+            sys.stdout = real_stdout
+            result = {"events": events, "timed_out": False, "status": 0, "exit": True}
+        sys.stdout.write(json.dumps(result) + "\n")
+        sys.stdout.flush()
+        if result.get("exit"):
+            return
+
+
+main()
+'''
+
+
+class ExecutionEvaluator:
+    """
+    Runs generated Python code against test cases in sandboxed worker processes.
+
+    Tests are Python source executed after the generated code, in the same
+    namespace. Every callable named test* becomes a test case; a test source
+    without test functions (plain asserts) is a single test case.
+    """
+
+    def __init__(self, workers: int = 2, timeout: float = 5.0, memory_mb: int = 256,
+                 cpu_seconds: int = 10):
+        """
+        Start the worker pool.
+
+        Args:
+            workers: Worker processes kept warm (concurrent jobs)
+            timeout: Seconds allowed for loading the code and for each test
+            memory_mb: Address-space limit per job (POSIX)
+            cpu_seconds: CPU time limit per job (POSIX)
+        """
+        self.workers = max(1, workers)
+        self.timeout = timeout
+        self.memory_mb = memory_mb
+        self.cpu_seconds = cpu_seconds
+        self._idle: "queue.Queue[_Worker]" = queue.Queue()
+        self._closed = False
+        for _ in range(self.workers):
+            self._idle.put(_Worker())
+        atexit.register(self.close)
+
+    def evaluate(self, generated_code: str, tests: str, language: str = "python") -> Dict[str, Any]:
+        """
+        Run generated code against tests.
+
+        Args:
+            generated_code: Code to test
+            tests: Test source (test* functions or plain asserts)
+            language: Only "python" can be executed
+
+        Returns:
+            Dictionary with "passed" (every test passed), "tests_passed",
+            "tests_total", "pass_rate", per-test "tests" results, "error"
+            (load failure, timeout or crash) and captured "output"
+        """
+        if self._closed:
+            raise RuntimeError("ExecutionEvaluator is closed")
+        if (language or "python").lower() not in ("python", "py"):
+            return _summary([], error=f"Execution tests support Python only, not {language}")
+        if not tests or not tests.strip():
+            return _summary([], error="No tests given")
+
+        job = {"code": generated_code, "tests": tests, "timeout": self.timeout,
+               "memory_mb": self.memory_mb, "cpu_seconds": self.cpu_seconds}
+        worker = self._idle.get()
+        try:
+            # The worker enforces the per-step timeout; this is the backstop
+            # for the whole job (and the only limit without fork)
+            result = worker.run(job, self.timeout * 20 + 5)
+        except Exception as e:
+            worker.kill()
+            worker = _Worker()
+            return _summary([], error=f"Sandbox failed: {e}")
+        finally:
+            if self._closed:
+                # close() ran while this job did
+                worker.kill()
+            else:
+                if worker.exited:
+                    worker = _Worker()
+                self._idle.put(worker)
+        return _result_from_events(result)
+
+    def close(self):
+        """Stop the worker processes."""
+        if self._closed:
+            return
+        self._closed = True
+        while True:
+            try:
+                self._idle.get_nowait().kill()
+            except queue.Empty:
+                break
+
+
+class _Worker:
+    """One warm worker interpreter, talking JSON lines over its stdin/stdout."""
+
+    def __init__(self):
+        self.process = subprocess.Popen(
+            [sys.executable, "-I", "-c", WORKER_SOURCE],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+            text=True, bufsize=1,
+        )
+        self.exited = False
+        self._lines: "queue.Queue[Optional[str]]" = queue.Queue()
+        threading.Thread(target=self._read, daemon=True).start()
+
+    def _read(self):
+        for line in self.process.stdout:
+            self._lines.put(line)
+        self._lines.put(None)
+
+    def run(self, job: Dict[str, Any], timeout: float) -> Dict[str, Any]:
+        self.process.stdin.write(json.dumps(job) + "\n")
+        self.process.stdin.flush()
+        try:
+            line = self._lines.get(timeout=timeout)
+        except queue.Empty:
+            raise TimeoutError(f"no result after {timeout:.0f}s")
+        if line is None:
+            raise RuntimeError("worker exited")
+        result = json.loads(line)
+        self.exited = bool(result.get("exit"))
+        return result
+
+    def kill(self):
+        self.exited = True
+        if self.process.poll() is None:
+            self.process.kill()
+            self.process.wait()
+
+
+def _result_from_events(result: Dict[str, Any]) -> Dict[str, Any]:
+    """Turn the worker's event log into the evaluate() result."""
+    names: List[str] = []
+    finished: Dict[str, Dict[str, Any]] = {}
+    error = None
+    output = ""
+    done = False
+    for event in result["events"]:
+        kind = event["event"]
+        if kind == "setup":
+            error = f"Generated code failed to load: {event['error']}"
+            output = event.get("output", "")
+        elif kind == "tests":
+            names = event["names"]
+        elif kind == "test":
+            finished[event["name"]] = {key: event[key] for key in ("name", "passed", "error", "seconds")}
+        elif kind == "done":
+            output = event.get("output", "")
+            done = True
+
+    tests = []
+    for name in names:
+        if name in finished:
+            tests.append(finished[name])
+        else:
+            # The job stopped while this test was running (or before it started)
+            reason = "not run"
+            if not tests or tests[-1]["error"] not in ("timed out", "stopped"):
+                reason = "timed out" if result["timed_out"] else "stopped"
+            tests.append({"name": name, "passed": False, "error": reason, "seconds": None})
+
+    if error is None and not done:
+        status = result["status"]
+        if result["timed_out"]:
+            stopped = "Timed out"
+        elif status < 0:
+            stopped = f"Killed by signal {-status} (CPU or memory limit)"
+        else:
+            stopped = f"Exited early with status {status}"
+        where = "loading the generated code" if not names else "running the tests"
+        error = f"{stopped} while {where}"
+    return _summary(tests, error=error, output=output)
+
+
+def _summary(tests: List[Dict[str, Any]], error: Optional[str] = None,
+             output: str = "") -> Dict[str, Any]:
+    passed = sum(1 for test in tests if test["passed"])
+    return {
+        "passed": error is None and bool(tests) and passed == len(tests),
+        "tests_passed": passed,
+        "tests_total": len(tests),
+        "pass_rate": passed / len(tests) if tests else 0.0,
+        "tests": tests,
+        "error": error,
+        "output": output,
+    }
+
+
+def format_execution_report(result: Dict[str, Any]) -> str:
+    """Human-readable summary of an evaluate() result."""
+    status = "PASSED" if result["passed"] else "FAILED"
+    lines = [f"Execution tests: {status} ({result['tests_passed']}/{result['tests_total']})"]
+    if result["error"]:
+        lines.append(f"  Error: {result['error']}")
+    for test in result["tests"]:
+        mark = "ok" if test["passed"] else f"FAIL: {test['error']}"
+        lines.append(f"  {test['name']}: {mark}")
+    return "\n".join(lines)
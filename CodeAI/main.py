@@ -5,9 +5,10 @@ Prototype for industry-usable AI code generation assistant
 
 import os
 import sys
-from typing import Optional
+import json
+from typing import List, Optional, Sequence
 from code_generator import CodeGenerator
-from code_evaluator import CodeBLEUEvaluator
+from response_cache import ResponseCache, SQLiteCache
 
 # Try to load from .env file if available
 try:
@@ -16,24 +17,48 @@ try:
 except ImportError:
     pass  # python-dotenv is optional
 
+DEFAULT_CACHE_FILE = os.path.join(os.path.expanduser("~"), ".cache", "codeai", "responses.sqlite")
+# Cached responses expire after a day, so asking again eventually gets a new answer
+DEFAULT_CACHE_TTL = float(os.getenv("CODEAI_CACHE_TTL", "86400"))
+
 
 class AICodeAssistant:
     """
     Main interface combining code generation and evaluation.
     """
     
-    def __init__(self, api_key: Optional[str] = None, model: str = "codestral-latest"):
+    def __init__(self, api_key: Optional[str] = None, model: str = "codestral-latest",
+                 cache: Optional[ResponseCache] = None):
         """
         Initialize the AI Code Assistant.
         
         Args:
             api_key: Mistral API key (or set MISTRAL_API_KEY environment variable)
             model: Model to use for code generation (default: codestral-latest)
+            cache: Optional response cache for generated code
         """
-        self.generator = CodeGenerator(api_key=api_key, model=model)
-        self.evaluator = CodeBLEUEvaluator()
+        self.generator = CodeGenerator(api_key=api_key, model=model, cache=cache)
+        self._evaluator = None
+        self._executor = None
+    
+    @property
+    def evaluator(self):
+        """CodeBLEU evaluator, created on first use so generate-only runs don't load it."""
+        if self._evaluator is None:
+            from code_evaluator import CodeBLEUEvaluator
+            self._evaluator = CodeBLEUEvaluator()
+        return self._evaluator
+    
+    @property
+    def executor(self):
+        """Sandboxed test runner, started on first use (its worker processes stay warm)."""
+        if self._executor is None:
+            from execution_evaluator import ExecutionEvaluator
+            self._executor = ExecutionEvaluator()
+        return self._executor
     
-    def generate(self, query: str, language: Optional[str] = None) -> str:
+    def generate(self, query: str, language: Optional[str] = None,
+                 use_cache: bool = True, model: Optional[str] = None) -> str:
         """
         Generate code based on user query.
         Returns ONLY code, no explanations.
@@ -41,11 +66,13 @@ class AICodeAssistant:
         Args:
             query: User's code generation request
             language: Target programming language
+            use_cache: Set to False to bypass the response cache
+            model: Model for this call (default: the assistant's model)
         
         Returns:
             Generated code string
         """
-        return self.generator.generate_code(query, language)
+        return self.generator.generate_code(query, language, use_cache=use_cache, model=model)
     
     def evaluate(self, generated_code: str, reference_code: str, 
                 language: str = "python") -> dict:
@@ -62,8 +89,23 @@ class AICodeAssistant:
         """
         return self.evaluator.evaluate(generated_code, reference_code, language)
     
+    def run_tests(self, generated_code: str, tests: str, language: str = "python") -> dict:
+        """
+        Run generated code against test cases in the sandbox.
+        
+        Args:
+            generated_code: Code generated by the agent
+            tests: Python test source (test* functions or plain asserts)
+            language: Programming language (only Python is executed)
+        
+        Returns:
+            Execution results dictionary (see ExecutionEvaluator.evaluate)
+        """
+        return self.executor.evaluate(generated_code, tests, language)
+    
     def generate_and_evaluate(self, query: str, reference_code: str,
-                             language: Optional[str] = None) -> dict:
+                             language: Optional[str] = None,
+                             tests: Optional[str] = None) -> dict:
         """
         Generate code and evaluate it in one step.
         
@@ -71,18 +113,199 @@ class AICodeAssistant:
             query: User's code generation request
             reference_code: Correct/reference code for evaluation
             language: Target programming language
+            tests: Optional Python test source; when given, the generated code
+                   is also executed against it
         
         Returns:
-            Dictionary with generated code and evaluation results
+            Dictionary with generated code, evaluation results and, with
+            tests, execution results
         """
         generated_code = self.generate(query, language)
         evaluation = self.evaluate(generated_code, reference_code, 
                                    language or "python")
         
-        return {
+        result = {
             "generated_code": generated_code,
             "evaluation": evaluation
         }
+        if tests is not None:
+            result["execution"] = self.run_tests(generated_code, tests, language or "python")
+        return result
+
+    def evaluate_samples(self, samples: List[str], reference_code: Optional[str] = None,
+                         tests: Optional[str] = None, language: str = "python",
+                         ks: Optional[Sequence[int]] = None) -> dict:
+        """
+        Score several samples for the same query.
+        
+        Samples that differ only in comments or formatting are scored once. A sample passes
+        if it passes every test, or without tests if its CodeBLEU meets the
+        correctness threshold.
+        
+        Args:
+            samples: Generated code samples (duplicates included)
+            reference_code: Reference code for CodeBLEU
+            tests: Python test source for execution
+            language: Programming language
+            ks: Budgets to report pass@k for (default: 1 and len(samples))
+        
+        Returns:
+            Dictionary with per-unique-sample results ("samples"), "n",
+            "unique", "pass_at_k" and "best" (highest CodeBLEU sample)
+        """
+        from concurrent.futures import ThreadPoolExecutor
+        from sampling import group_samples, pass_at_k
+        
+        if reference_code is None and tests is None:
+            raise ValueError("reference_code or tests is required to score samples")
+        
+        groups = group_samples(samples, language)
+        codes = [code for code, _ in groups]
+        results = [{"code": code, "count": count} for code, count in groups]
+        
+        if reference_code is not None:
+            evaluations = self.evaluator.evaluate_many(codes, reference_code, language)
+            for result, evaluation in zip(results, evaluations):
+                result["evaluation"] = evaluation
+        if tests is not None:
+            # The sandbox runs one job per worker; keep them all busy
+            with ThreadPoolExecutor(max_workers=self.executor.workers) as pool:
+                executions = list(pool.map(lambda code: self.run_tests(code, tests, language), codes))
+            for result, execution in zip(results, executions):
+                result["execution"] = execution
+        
+        for result in results:
+            if tests is not None:
+                result["passed"] = result["execution"]["passed"]
+            else:
+                result["passed"] = result["evaluation"]["is_correct"]
+        
+        n = len(samples)
+        correct = sum(result["count"] for result in results if result["passed"])
+        ks = sorted(set(ks or (1, n)))
+        summary = {
+            "n": n,
+            "unique": len(results),
+            "correct": correct,
+            "pass_at_k": {f"pass@{k}": pass_at_k(n, correct, k) for k in ks if k <= n},
+            "samples": results,
+            "best": None,
+        }
+        if reference_code is not None and results:
+            # Best-of-k CodeBLEU: the score an oracle picking one sample would get
+            summary["best"] = max(results, key=lambda result: result["evaluation"]["codebleu"])
+        return summary
+    
+    def generate_and_evaluate_samples(self, query: str, n: int = 5,
+                                      reference_code: Optional[str] = None,
+                                      tests: Optional[str] = None,
+                                      language: Optional[str] = None,
+                                      ks: Optional[Sequence[int]] = None,
+                                      temperature: float = 0.8) -> dict:
+        """
+        Generate n samples in one request and report pass@k and best-of-k CodeBLEU.
+        
+        Args:
+            query: User's code generation request
+            n: Number of samples
+            reference_code: Reference code for CodeBLEU
+            tests: Python test source for execution
+            language: Target programming language
+            ks: Budgets to report pass@k for (default: 1 and n)
+            temperature: Sampling temperature
+        
+        Returns:
+            evaluate_samples() results
+        """
+        language = language or self.generator._detect_language(query)
+        samples = self.generator.generate_samples(query, n=n, language=language,
+                                                  temperature=temperature)
+        return self.evaluate_samples(samples, reference_code, tests, language, ks)
+
+
+def serve(argv):
+    """
+    Run the resident daemon: python main.py serve [--socket PATH | --port N]
+    """
+    import argparse
+    import signal
+    from daemon import AssistantServer, default_address, parse_address
+    
+    parser = argparse.ArgumentParser(
+        prog="main.py serve",
+        description="Keep one AICodeAssistant resident for fast CLI calls"
+    )
+    parser.add_argument("--socket", help="Unix socket path to listen on", default=None)
+    parser.add_argument("--port", help="Listen on 127.0.0.1:PORT instead of a socket", type=int, default=None)
+    parser.add_argument("--api-key", help="Mistral API key (or set MISTRAL_API_KEY env var)", default=None)
+    parser.add_argument("--model", help="Model to use for generation", default="codestral-latest")
+    parser.add_argument("--no-cache", help="Disable the response cache", action="store_true")
+    parser.add_argument(
+        "--cache-file",
+        help="SQLite response cache file (or set CODEAI_CACHE_FILE env var)",
+        default=os.getenv("CODEAI_CACHE_FILE", DEFAULT_CACHE_FILE)
+    )
+    parser.add_argument(
+        "--cache-ttl",
+        help="Seconds a cached response stays valid (or set CODEAI_CACHE_TTL env var; default: one day)",
+        type=float,
+        default=DEFAULT_CACHE_TTL
+    )
+    args = parser.parse_args(argv)
+    
+    if args.port is not None:
+        address = ("127.0.0.1", args.port)
+    else:
+        address = parse_address(args.socket or default_address())
+    
+    cache = None if args.no_cache else SQLiteCache(args.cache_file, ttl=args.cache_ttl)
+    assistant = AICodeAssistant(api_key=args.api_key, model=args.model, cache=cache)
+    server = AssistantServer(assistant, address)
+    server.warm_up()
+    # Treat SIGTERM like Ctrl+C so the socket file is removed
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    print(f"CodeAI daemon listening on {server.server_address} (Ctrl+C to stop)", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def run_with_daemon(args) -> bool:
+    """
+    Forward a generate (and evaluate) request to a running daemon.
+    
+    Returns:
+        False if no daemon is running, so the caller should run locally
+    """
+    from daemon import DaemonClient
+    
+    client = DaemonClient(args.daemon)
+    if client.health() is None:
+        return False
+    
+    language = args.language or "python"
+    generated_code = client.generate(args.query, args.language, use_cache=not args.no_cache,
+                                     model=args.model)
+    print(generated_code)
+    
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(generated_code)
+        print(f"\nCode saved to {args.output}", file=sys.stderr)
+    
+    if args.evaluate:
+        with open(args.evaluate, 'r', encoding='utf-8') as f:
+            reference_code = f.read()
+        print(client.evaluate(generated_code, reference_code, language)["report"], file=sys.stderr)
+    
+    if args.tests:
+        with open(args.tests, 'r', encoding='utf-8') as f:
+            tests = f.read()
+        print(client.execute(generated_code, tests, language)["report"], file=sys.stderr)
+    return True
 
 
 def main():
@@ -91,11 +314,16 @@ def main():
     """
     import argparse
     
+    if sys.argv[1:2] == ["serve"]:
+        serve(sys.argv[2:])
+        return
+    
     parser = argparse.ArgumentParser(
         description="AI Code Generator and Evaluator - Industry Prototype"
     )
     parser.add_argument(
         "query",
+        nargs="?",
         help="Code generation query"
     )
     parser.add_argument(
@@ -108,6 +336,11 @@ def main():
         help="Reference code file to evaluate against",
         default=None
     )
+    parser.add_argument(
+        "--tests", "-t",
+        help="Python test file to run the generated code against (test_* functions or asserts)",
+        default=None
+    )
     parser.add_argument(
         "--output", "-o",
         help="Output file to save generated code",
@@ -123,9 +356,82 @@ def main():
         help="Model to use for generation (codestral-latest, codestral-mamba-latest)",
         default="codestral-latest"
     )
+    parser.add_argument(
+        "--no-cache",
+        help="Always call the API, bypassing the response cache",
+        action="store_true"
+    )
+    parser.add_argument(
+        "--cache-file",
+        help="SQLite response cache file (or set CODEAI_CACHE_FILE env var)",
+        default=os.getenv("CODEAI_CACHE_FILE", DEFAULT_CACHE_FILE)
+    )
+    parser.add_argument(
+        "--cache-ttl",
+        help="Seconds a cached response stays valid (or set CODEAI_CACHE_TTL env var; default: one day)",
+        type=float,
+        default=DEFAULT_CACHE_TTL
+    )
+    
+    parser.add_argument(
+        "--daemon",
+        help="Daemon address (socket path or host:port; default: CODEAI_DAEMON or ~/.cache/codeai/daemon.sock)",
+        default=None
+    )
+    parser.add_argument(
+        "--no-daemon",
+        help="Run in this process even if a daemon (python main.py serve) is running",
+        action="store_true"
+    )
+    
+    parser.add_argument(
+        "--eval-corpus",
+        help="Score a JSONL file of {generated_code, reference_code[, language, id]} pairs",
+        default=None
+    )
+    parser.add_argument(
+        "--results",
+        help="With --eval-corpus: JSONL file to write per-pair results to",
+        default=None
+    )
+    parser.add_argument(
+        "--workers",
+        help="With --eval-corpus: number of worker processes (default: CPU count)",
+        type=int,
+        default=None
+    )
     
     args = parser.parse_args()
     
+    # Batch evaluation needs no API key or query
+    if args.eval_corpus:
+        from code_evaluator import CodeBLEUEvaluator
+        evaluator = CodeBLEUEvaluator()
+        summary = evaluator.evaluate_corpus(
+            args.eval_corpus,
+            language=args.language or "python",
+            workers=args.workers,
+            output_path=args.results
+        )
+        print(json.dumps(summary, indent=2))
+        return
+    
+    if not args.query:
+        parser.error("query is required unless --eval-corpus is given")
+    
+    # A running daemon already has warm clients, caches and evaluator. It
+    # uses its own API key and cache, so requests that set either run here.
+    own_settings = (args.api_key is not None
+                    or args.cache_file != parser.get_default("cache_file")
+                    or args.cache_ttl != parser.get_default("cache_ttl"))
+    if not args.no_daemon and not own_settings:
+        try:
+            if run_with_daemon(args):
+                return
+        except Exception as e:
+            print(f"Error: {str(e)}", file=sys.stderr)
+            sys.exit(1)
+    
     # Initialize assistant
     api_key = args.api_key or os.getenv("MISTRAL_API_KEY")
     if not api_key:
@@ -133,7 +439,8 @@ def main():
         print("Get your API key from: https://console.mistral.ai/")
         sys.exit(1)
     
-    assistant = AICodeAssistant(api_key=api_key, model=args.model)
+    cache = None if args.no_cache else SQLiteCache(args.cache_file, ttl=args.cache_ttl)
+    assistant = AICodeAssistant(api_key=api_key, model=args.model, cache=cache)
     
     # Generate code
     try:
@@ -150,6 +457,7 @@ def main():
         
         # Evaluate if reference code provided
         if args.evaluate:
+            from code_evaluator import format_evaluation_report
             with open(args.evaluate, 'r', encoding='utf-8') as f:
                 reference_code = f.read()
             
@@ -159,12 +467,16 @@ def main():
                 args.language or "python"
             )
             
-            report = assistant.evaluator.get_evaluation_report(
-                generated_code,
-                reference_code,
-                args.language or "python"
-            )
-            print(report, file=sys.stderr)
+            print(format_evaluation_report(evaluation), file=sys.stderr)
+        
+        # Run test cases if provided
+        if args.tests:
+            from execution_evaluator import format_execution_report
+            with open(args.tests, 'r', encoding='utf-8') as f:
+                tests = f.read()
+            
+            execution = assistant.run_tests(generated_code, tests, args.language or "python")
+            print(format_execution_report(execution), file=sys.stderr)
     
     except Exception as e:
         print(f"Error: {str(e)}", file=sys.stderr)
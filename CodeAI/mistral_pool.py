@@ -0,0 +1,173 @@
+"""
+Mistral Client Pool
+Process-wide Mistral clients sharing one keep-alive HTTP connection pool
+"""
+
+import os
+import threading
+import weakref
+from typing import Optional
+
+# Pool settings; change with configure() before the first request
+POOL_SIZE = int(os.getenv("MISTRAL_POOL_SIZE", "10"))
+TIMEOUT = float(os.getenv("MISTRAL_TIMEOUT", "120"))
+CONNECT_TIMEOUT = 10.0
+KEEPALIVE_EXPIRY = 60.0
+# HTTP/2 needs the optional h2 package (pip install h2)
+HTTP2 = os.getenv("MISTRAL_HTTP2", "1") != "0"
+
+_lock = threading.Lock()
+_http_client = None
+# The SDK wants an async client on every Mistral instance; sync clients share
+# this one, which stays idle
+_idle_async_client = None
+_sync_clients = {}
+# Async connections belong to the event loop that opened them, so each loop
+# gets its own pool; entries go away with their loop
+_async_clients: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+
+
+def configure(pool_size: Optional[int] = None, timeout: Optional[float] = None,
+              http2: Optional[bool] = None):
+    """
+    Change pool settings. Existing pools are closed and rebuilt on next use.
+
+    Args:
+        pool_size: Maximum connections (and keep-alive connections) per pool
+        timeout: Read/write timeout in seconds for API calls
+        http2: Use HTTP/2 when the h2 package is installed
+    """
+    global POOL_SIZE, TIMEOUT, HTTP2
+    if pool_size is not None:
+        POOL_SIZE = pool_size
+    if timeout is not None:
+        TIMEOUT = timeout
+    if http2 is not None:
+        HTTP2 = http2
+    close()
+
+
+def _http2_enabled() -> bool:
+    if not HTTP2:
+        return False
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def _client_options() -> dict:
+    import httpx
+    return {
+        "follow_redirects": True,
+        "http2": _http2_enabled(),
+        "limits": httpx.Limits(max_connections=POOL_SIZE,
+                               max_keepalive_connections=POOL_SIZE,
+                               keepalive_expiry=KEEPALIVE_EXPIRY),
+        "timeout": httpx.Timeout(TIMEOUT, connect=CONNECT_TIMEOUT),
+    }
+
+
+def _new_mistral(api_key: str, server_url: Optional[str], client=None, async_client=None):
+    from mistralai import Mistral
+    return Mistral(api_key=api_key, server_url=server_url, client=client,
+                   async_client=async_client, timeout_ms=int(TIMEOUT * 1000))
+
+
+def _shared_http_client():
+    """The shared synchronous httpx client, created on first use (caller holds _lock)."""
+    global _http_client
+    if _http_client is None:
+        import httpx
+        _http_client = httpx.Client(**_client_options())
+    return _http_client
+
+
+def _shared_idle_async_client():
+    """The async client given to sync clients, created on first use (caller holds _lock)."""
+    global _idle_async_client
+    if _idle_async_client is None:
+        import httpx
+        _idle_async_client = httpx.AsyncClient()
+    return _idle_async_client
+
+
+def get_client(api_key: str, server_url: Optional[str] = None):
+    """
+    Shared Mistral client for synchronous calls.
+    Every API key and server URL uses the same connection pool; the model is
+    chosen per request.
+    """
+    key = (api_key, server_url)
+    with _lock:
+        client = _sync_clients.get(key)
+        if client is None:
+            client = _new_mistral(api_key, server_url, client=_shared_http_client(),
+                                  async_client=_shared_idle_async_client())
+            _sync_clients[key] = client
+        return client
+
+
+def get_async_client(api_key: str, server_url: Optional[str] = None):
+    """
+    Shared Mistral client for async calls on the running event loop.
+    Must be called from inside a coroutine.
+    """
+    import asyncio
+    loop = asyncio.get_running_loop()
+    key = (api_key, server_url)
+    with _lock:
+        pool = _async_clients.get(loop)
+        if pool is None:
+            import httpx
+            pool = _async_clients[loop] = {"http": httpx.AsyncClient(**_client_options())}
+        client = pool.get(key)
+        if client is None:
+            client = pool[key] = _new_mistral(api_key, server_url, client=_shared_http_client(),
+                                              async_client=pool["http"])
+        return client
+
+
+async def aclose_loop():
+    """Close the running loop's async pool (call before the loop shuts down)."""
+    import asyncio
+    with _lock:
+        pool = _async_clients.pop(asyncio.get_running_loop(), None)
+    if pool is not None:
+        await pool["http"].aclose()
+
+
+def close():
+    """Close the shared pools, including every event loop's async pool, and forget all clients."""
+    global _http_client, _idle_async_client
+    with _lock:
+        if _http_client is not None:
+            _http_client.close()
+        async_clients = [(pool["http"], loop) for loop, pool in _async_clients.items()]
+        if _idle_async_client is not None:
+            async_clients.append((_idle_async_client, None))
+        _http_client = None
+        _idle_async_client = None
+        _sync_clients.clear()
+        _async_clients.clear()
+    for http_client, loop in async_clients:
+        _close_async(http_client, loop)
+
+
+def _close_async(http_client, loop):
+    """
+    Close an httpx.AsyncClient from synchronous code, on the loop that owns
+    its connections (None: a client that never opened any).
+    """
+    import asyncio
+    if loop is None:
+        try:
+            asyncio.get_running_loop().create_task(http_client.aclose())
+        except RuntimeError:
+            asyncio.run(http_client.aclose())
+    elif loop.is_running():
+        asyncio.run_coroutine_threadsafe(http_client.aclose(), loop)
+    elif not loop.is_closed():
+        loop.run_until_complete(http_client.aclose())
+    # A closed loop's connections can't be closed cleanly; they go with it
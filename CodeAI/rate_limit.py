@@ -0,0 +1,86 @@
+"""
+Rate limiting and retry helpers for concurrent API calls
+"""
+
+import asyncio
+import random
+import threading
+import time
+from typing import Optional
+
+# HTTP statuses worth retrying: rate limited or a server-side failure
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """
+    Async token bucket: allows `rate` requests per second with bursts of up
+    to `capacity` requests.
+
+    Each acquire() reserves a token immediately and then sleeps until that
+    token is due, so callers are served in arrival order. Reserving takes a
+    thread lock, never held across an await, so one bucket can be shared by
+    event loops running in different threads (generate_many calls
+    asyncio.run on the caller's thread).
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        """
+        Args:
+            rate: Tokens added per second
+            capacity: Maximum burst size (default: max(1, rate))
+        """
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Take one token and return how many seconds to wait before using it."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            tokens = self._tokens
+        return 0.0 if tokens >= 0 else -tokens / self.rate
+
+    async def acquire(self):
+        """Wait until a request may be sent."""
+        delay = self.reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+def error_status(error: Exception) -> Optional[int]:
+    """HTTP status code carried by an API error, if any."""
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "raw_response", None), "status_code", None)
+    return status
+
+
+def is_retryable(error: Exception) -> bool:
+    """True for rate limit (429) and 5xx errors."""
+    return error_status(error) in RETRYABLE_STATUS
+
+
+def backoff_delay(attempt: int, error: Optional[Exception] = None,
+                  base: float = 0.5, cap: float = 30.0) -> float:
+    """
+    Seconds to wait before retry number `attempt` (0-based).
+
+    Uses exponential backoff with full jitter, and honours a numeric
+    Retry-After header when the server sends one.
+    """
+    headers = getattr(getattr(error, "raw_response", None), "headers", None)
+    retry_after = headers.get("retry-after") if headers is not None else None
+    if retry_after:
+        try:
+            return min(cap, float(retry_after))
+        except ValueError:
+            pass  # HTTP-date form; fall back to backoff
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
@@ -0,0 +1,72 @@
+"""
+Sampling utilities
+Deduplication of generated samples and the unbiased pass@k estimator
+"""
+
+import ast
+from typing import List, Sequence, Tuple
+
+from code_lexer import get_lexer
+
+
+def _sample_key(sample: str, language: str) -> str:
+    """
+    Key shared only by samples that behave the same.
+
+    Python is compared by syntax tree, so comments and formatting don't count
+    but indentation does. Other languages (and Python that doesn't parse) are
+    compared with comments, trailing whitespace and blank lines removed;
+    leading whitespace is kept.
+    """
+    if language == "python":
+        try:
+            return ast.dump(ast.parse(sample))
+        except SyntaxError:
+            pass
+    code = get_lexer(language).comment_pattern.sub('', sample)
+    return '\n'.join(line.rstrip() for line in code.split('\n') if line.strip())
+
+
+def group_samples(samples: Sequence[str], language: str = "python") -> List[Tuple[str, int]]:
+    """
+    Group samples that differ only in comments or formatting, so each group
+    is scored once.
+
+    Args:
+        samples: Generated code samples
+        language: Programming language
+
+    Returns:
+        (first sample of the group, number of samples in it), in first-seen order
+    """
+    groups = {}
+    for sample in samples:
+        key = _sample_key(sample, language)
+        if key in groups:
+            groups[key][1] += 1
+        else:
+            groups[key] = [sample, 1]
+    return [(sample, count) for sample, count in groups.values()]
+
+
+def pass_at_k(n: int, c: int, k: int) -> float:
+    """
+    Unbiased estimate of pass@k from n samples of which c passed:
+    1 - C(n - c, k) / C(n, k), computed as a running product for stability.
+
+    Args:
+        n: Number of samples
+        c: Number of passing samples
+        k: Budget of attempts (at most n)
+
+    Returns:
+        Probability that at least one of k samples passes
+    """
+    if k > n:
+        raise ValueError(f"pass@{k} needs at least {k} samples, got {n}")
+    if n - c < k:
+        return 1.0
+    estimate = 1.0
+    for i in range(n - c + 1, n + 1):
+        estimate *= 1.0 - k / i
+    return 1.0 - estimate
@@ -0,0 +1,13 @@
+"""
+Shared modules
+Puts the repository root on sys.path, once, so CodeAI modules can import the
+llm_common package shared with the Chatbot backend.
+"""
+
+import os
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+if REPO_ROOT not in sys.path:
+    sys.path.append(REPO_ROOT)
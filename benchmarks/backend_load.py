@@ -0,0 +1,99 @@
+"""
+Load test for the Chatbot FastAPI backend against a local stub Gemini model.
+Shows how request throughput scales with the number of concurrent clients.
+
+Usage:
+    python benchmarks/backend_load.py --latency 0.2 --requests 64
+"""
+
+import argparse
+import asyncio
+import importlib.util
+import os
+import sys
+import time
+
+import httpx
+
+BACKEND_DIR = os.path.join(os.path.dirname(__file__), "..", "Chatbot_LLM", "Backend")
+
+
+class StubResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class StubModel:
+    """Blocking stand-in for genai.GenerativeModel with a fixed latency."""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+
+    def generate_content(self, prompt, **kwargs):
+        time.sleep(self.latency)
+        return StubResponse("```python\nprint('hello')\n```")
+
+    def start_chat(self, history=None):
+        return StubChat(self)
+
+
+class StubChat:
+    """Stand-in for genai.ChatSession; /chat sends through one per turn."""
+
+    def __init__(self, model):
+        self.model = model
+
+    def send_message(self, content, **kwargs):
+        return self.model.generate_content(content, **kwargs)
+
+
+def load_backend(stub_model):
+    """Import the backend app with the Gemini model replaced by a stub."""
+    os.environ.setdefault("GEMINI_API_KEY", "stub")
+    sys.path.insert(0, os.path.abspath(BACKEND_DIR))
+    spec = importlib.util.spec_from_file_location(
+        "chatbot_backend", os.path.join(BACKEND_DIR, "main.py")
+    )
+    backend = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(backend)
+    backend.model = backend.chat_model = stub_model
+    return backend
+
+
+async def run_level(app, concurrency: int, total: int) -> float:
+    """Send `total` /chat requests with `concurrency` in flight; return req/s."""
+    transport = httpx.ASGITransport(app=app)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def one(i):
+            async with semaphore:
+                response = await client.post("/chat", json={"message": f"hello {i}"})
+                response.raise_for_status()
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(total)))
+        elapsed = time.perf_counter() - start
+
+    return total / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backend concurrency load test")
+    parser.add_argument("--latency", type=float, default=0.2, help="Stub model latency in seconds")
+    parser.add_argument("--requests", type=int, default=32, help="Requests per concurrency level")
+    parser.add_argument(
+        "--levels", default="1,2,4,8,16", help="Comma-separated concurrency levels"
+    )
+    args = parser.parse_args()
+
+    backend = load_backend(StubModel(args.latency))
+    print(f"GEMINI_MAX_CONCURRENCY={backend.GEMINI_MAX_CONCURRENCY}, stub latency={args.latency}s")
+    print(f"{'concurrency':>12} {'req/s':>10}")
+    for level in (int(x) for x in args.levels.split(",")):
+        throughput = asyncio.run(run_level(backend.app, level, args.requests))
+        print(f"{level:>12} {throughput:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
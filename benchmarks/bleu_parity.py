@@ -0,0 +1,92 @@
+"""
+Parity and speed of the built-in BLEU-4 (CodeAI/bleu.py) against nltk.
+
+Both implementations score the same code-tokenized corpus: every sentence
+score (for each smoothing method) and the corpus score must agree to within
+1e-12, then per-pair timings are compared.
+
+Usage:
+    python benchmarks/bleu_parity.py --pairs 500 --lines 30
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+import warnings
+
+from nltk.translate.bleu_score import SmoothingFunction
+from nltk.translate.bleu_score import corpus_bleu as nltk_corpus_bleu
+from nltk.translate.bleu_score import sentence_bleu as nltk_sentence_bleu
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "CodeAI"))
+
+from bleu import corpus_bleu, sentence_bleu, tokenize_code  # noqa: E402
+
+LINE_TEMPLATES = [
+    "def {name}(x, y=1):",
+    "    result = x + y * {n}",
+    "    if result >= {n} and x != y:",
+    "        return result - {n}",
+    "    for i in range({n}):",
+    "        total += values[i] ** 2",
+    "    print('{name}', result)",
+    "class Model{n}:",
+]
+
+NLTK_SMOOTHING = {
+    None: None,
+    "epsilon": SmoothingFunction().method1,
+    "add-one": SmoothingFunction().method2,
+}
+
+
+def make_code(lines: int, rng: random.Random) -> str:
+    return "\n".join(
+        rng.choice(LINE_TEMPLATES).format(name=f"fn_{rng.randint(0, 9)}", n=rng.randint(0, 9))
+        for _ in range(rng.randint(0, lines))
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Built-in BLEU vs nltk: parity and speed")
+    parser.add_argument("--pairs", type=int, default=500)
+    parser.add_argument("--lines", type=int, default=30, help="Maximum lines per sample")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    pairs = [(tokenize_code(make_code(args.lines, rng)), tokenize_code(make_code(args.lines, rng)))
+             for _ in range(args.pairs)]
+    warnings.simplefilter("ignore")  # nltk warns on every zero n-gram overlap
+
+    worst = 0.0
+    for smoothing, nltk_smoothing in NLTK_SMOOTHING.items():
+        for hyp, ref in pairs:
+            expected = nltk_sentence_bleu([ref], hyp, smoothing_function=nltk_smoothing)
+            worst = max(worst, abs(sentence_bleu(hyp, ref, smoothing) - expected))
+        expected = nltk_corpus_bleu([[ref] for _, ref in pairs], [hyp for hyp, _ in pairs],
+                                    smoothing_function=nltk_smoothing)
+        worst = max(worst, abs(corpus_bleu(pairs, smoothing) - expected))
+    print(f"max |built-in - nltk| over {args.pairs} pairs x 3 smoothings: {worst:.2e}")
+    if worst > 1e-12:
+        sys.exit("parity check FAILED")
+
+    smoothing = NLTK_SMOOTHING["add-one"]
+    start = time.perf_counter()
+    for hyp, ref in pairs:
+        nltk_sentence_bleu([ref], hyp, smoothing_function=smoothing)
+    nltk_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for hyp, ref in pairs:
+        sentence_bleu(hyp, ref, "add-one")
+    builtin_time = time.perf_counter() - start
+
+    print(f"nltk sentence_bleu: {nltk_time / args.pairs * 1e6:8.1f} us/pair")
+    print(f"built-in:           {builtin_time / args.pairs * 1e6:8.1f} us/pair")
+    print(f"speedup: {nltk_time / builtin_time:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
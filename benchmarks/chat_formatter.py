@@ -0,0 +1,87 @@
+"""
+Speed of the single-pass chat formatter (Chatbot_LLM/Backend/chat_formatter.py)
+against the previous str.replace chain, on long chat answers.
+
+Outside code blocks the output must match the old formatter, except that the
+closing "**" of bold text is no longer eaten. Text containing ``` fences is
+only timed, since the old formatter mangled code blocks.
+
+Usage:
+    python benchmarks/chat_formatter.py --paragraphs 200 --runs 200
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "Chatbot_LLM", "Backend"))
+
+from chat_formatter import format_chat_response  # noqa: E402
+
+PARAGRAPHS = [
+    "### Overview",
+    "Recursion solves a problem by calling the same function on a **smaller input**.",
+    "* Base case: stops the recursion",
+    "- Recursive case: reduces the problem",
+    "1. Define the base case",
+    "2. Call the function on a smaller input",
+    "*• Leftover bullet from the model",
+    "The result is built while the calls return, so the stack depth matters.",
+]
+CODE_BLOCK = "```python\ndef factorial(n):\n    if n <= 1:\n        return 1\n    return n * factorial(n - 1)\n```"
+
+
+def old_format(text):
+    """The formatter /chat used before: five str.replace passes plus split/strip/join"""
+    text = text.replace('** ', '\0')  # keep bold, like the new formatter
+    lines = []
+    for line in text.strip().split('\n'):
+        line = line.replace('* ', '• ')
+        line = line.replace('- ', '• ')
+        line = line.replace('*•', '')
+        lines.append(line.replace('\0', '** ').strip())
+    return '\n\n'.join(line for line in lines if line)
+
+
+def make_answer(paragraphs: int, rng: random.Random, code: bool) -> str:
+    parts = [rng.choice(PARAGRAPHS) for _ in range(paragraphs)]
+    if code:
+        for i in range(0, len(parts), 40):
+            parts[i] = CODE_BLOCK
+    return "\n".join(parts)
+
+
+def timed(func, text, runs, repeats=5):
+    """Best per-call time over several repeats"""
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for _ in range(runs):
+            func(text)
+        best = min(best, (time.perf_counter() - start) / runs)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Chat formatter: single pass vs str.replace chain")
+    parser.add_argument("--paragraphs", type=int, default=200, help="Lines per answer")
+    parser.add_argument("--runs", type=int, default=200)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    plain = make_answer(args.paragraphs, rng, code=False)
+    if format_chat_response(plain) != old_format(plain):
+        sys.exit("parity check FAILED")
+    print("output matches the old formatter on text without code blocks")
+
+    for name, text in (("plain", plain), ("with code", make_answer(args.paragraphs, rng, code=True))):
+        old_time = timed(old_format, text, args.runs)
+        new_time = timed(format_chat_response, text, args.runs)
+        print(f"{name:10s} ({len(text)} chars): old {old_time * 1e6:8.1f} us, "
+              f"new {new_time * 1e6:8.1f} us, speedup {old_time / new_time:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
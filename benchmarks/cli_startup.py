@@ -0,0 +1,102 @@
+"""
+Cold-start time of the CodeAI CLI (python CodeAI/main.py).
+
+Each scenario runs the CLI in a fresh interpreter with -X importtime against
+the local stub server (stub_llm.py, via MISTRAL_SERVER_URL) and reports the
+median wall time and the time spent importing modules.
+
+Scenarios:
+- generate:           cache miss, one API call
+- generate-cached:    answered from the SQLite response cache
+- generate+evaluate:  cached generation plus --evaluate against a reference file
+
+Usage:
+    python benchmarks/cli_startup.py --runs 5
+    python benchmarks/cli_startup.py --top 10   # also list the slowest imports
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from stub_llm import DEFAULT_CODE, StubConfig, StubServer
+
+CLI = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "CodeAI", "main.py")
+QUERY = "Create a Python function to calculate factorial"
+
+
+def parse_importtime(stderr: str):
+    """Return (total import seconds, {module: cumulative seconds}) from -X importtime output."""
+    modules = {}
+    total_us = 0
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        depth = len(name) - len(name.lstrip())
+        name = name.strip()
+        cumulative_us = int(cumulative)
+        modules[name] = max(modules.get(name, 0), cumulative_us / 1e6)
+        if depth == 1:
+            total_us += cumulative_us
+    return total_us / 1e6, modules
+
+
+def run_cli(args, env):
+    start = time.perf_counter()
+    proc = subprocess.run([sys.executable, "-X", "importtime", CLI, *args],
+                          env=env, capture_output=True, text=True)
+    elapsed = time.perf_counter() - start
+    if proc.returncode != 0:
+        raise RuntimeError(f"CLI failed: {proc.stderr[-2000:]}")
+    return elapsed, proc.stderr
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CodeAI CLI cold-start benchmark")
+    parser.add_argument("--runs", type=int, default=5, help="Runs per scenario")
+    parser.add_argument("--top", type=int, default=0, help="Also report the N slowest imports")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp, StubServer(StubConfig(latency=0.0)) as server:
+        cache_file = os.path.join(tmp, "responses.sqlite")
+        reference = os.path.join(tmp, "reference.py")
+        with open(reference, "w") as f:
+            f.write(DEFAULT_CODE)
+
+        env = dict(os.environ, MISTRAL_API_KEY="stub", MISTRAL_SERVER_URL=server.url,
+                   CODEAI_CACHE_FILE=cache_file)
+        scenarios = {
+            "generate": [QUERY, "-l", "python", "--no-cache"],
+            "generate-cached": [QUERY, "-l", "python"],
+            "generate+evaluate": [QUERY, "-l", "python", "--evaluate", reference],
+        }
+        run_cli(scenarios["generate-cached"], env)  # fill the cache
+
+        results = {}
+        for name, cli_args in scenarios.items():
+            walls, imports, slowest = [], [], {}
+            for _ in range(args.runs):
+                wall, stderr = run_cli(cli_args, env)
+                total, modules = parse_importtime(stderr)
+                walls.append(wall)
+                imports.append(total)
+                slowest = modules
+            results[name] = {
+                "wall_ms": round(statistics.median(walls) * 1000, 1),
+                "import_ms": round(statistics.median(imports) * 1000, 1),
+            }
+            if args.top:
+                top = sorted(slowest.items(), key=lambda item: item[1], reverse=True)[:args.top]
+                results[name]["slowest_imports_ms"] = {m: round(s * 1000, 1) for m, s in top}
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
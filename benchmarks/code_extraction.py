@@ -0,0 +1,109 @@
+"""
+Code extraction: the old per-service regexes against the shared fence scanner
+(llm_common/code_fence.py).
+
+Responses come in the shapes models produce: bare code, a tagged block, a
+block with prose before and after, an untagged block, a shell block before
+the code, an alias tag ("py") and a block a stop sequence left unterminated.
+For each shape the extracted code is printed next to the expected code, then
+the time per response is compared on long replies, and the scanner is fed
+the same reply as streamed chunks to show how much of it is read.
+
+Usage:
+    python benchmarks/code_extraction.py --lines 200 --prose 2000 --runs 2000
+"""
+
+import argparse
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from llm_common.code_fence import FenceScanner, extract_code  # noqa: E402
+
+FENCE = "```"
+CODE = "def add(a, b):\n    return a + b"
+
+
+def codeai_regexes(text, language):
+    """CodeGenerator._find_code before the shared extractor"""
+    patterns = [
+        rf'```{language}\s*\n(.*?)\n```',
+        rf'```\s*\n(.*?)\n```',
+        rf'```{language}(.*?)```',
+        rf'```(.*?)```'
+    ]
+    for pattern in patterns:
+        matches = re.findall(pattern, text, re.DOTALL)
+        if matches:
+            return matches[0].strip()
+    return text.strip()
+
+
+def backend_regex(text, language):
+    """extract_code_block in the Chatbot backend before the shared extractor"""
+    match = re.search(rf"```{language}\n(.*?)\n```", text, re.DOTALL)
+    if match:
+        return match.group(1)
+    return text
+
+
+SHAPES = {
+    "bare code": CODE,
+    "tagged block": f"{FENCE}python\n{CODE}\n{FENCE}",
+    "prose around": f"Here is the function:\n\n{FENCE}python\n{CODE}\n{FENCE}\n\nIt adds two numbers.",
+    "untagged block": f"{FENCE}\n{CODE}\n{FENCE}",
+    "shell block first": f"Install nothing:\n{FENCE}bash\npip --version\n{FENCE}\n{FENCE}python\n{CODE}\n{FENCE}",
+    "alias tag": f"{FENCE}py\n{CODE}\n{FENCE}",
+    "unterminated": f"{FENCE}python\n{CODE}",
+}
+
+
+def long_reply(lines, prose_words):
+    body = "\n".join(f"    total += values[{i}] * {i}" for i in range(lines))
+    prose = " ".join(["explanation"] * prose_words)
+    return f"Sure, here it is.\n\n{FENCE}python\ndef f(values):\n    total = 0\n{body}\n{FENCE}\n\n{prose}\n"
+
+
+def per_call(func, text, runs):
+    start = time.perf_counter()
+    for _ in range(runs):
+        func(text, "python")
+    return (time.perf_counter() - start) / runs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Old regex extractors vs the shared fence scanner")
+    parser.add_argument("--lines", type=int, default=200, help="Code lines in the long reply")
+    parser.add_argument("--prose", type=int, default=2000, help="Words of prose after the block")
+    parser.add_argument("--runs", type=int, default=2000)
+    parser.add_argument("--chunk", type=int, default=40, help="Characters per streamed chunk")
+    args = parser.parse_args()
+
+    print(f"{'shape':<18} {'codeai regexes':>15} {'backend regex':>14} {'scanner':>8}")
+    for name, text in SHAPES.items():
+        marks = ["ok" if func(text, "python") == CODE else "WRONG"
+                 for func in (codeai_regexes, backend_regex, extract_code)]
+        print(f"{name:<18} {marks[0]:>15} {marks[1]:>14} {marks[2]:>8}")
+
+    reply = long_reply(args.lines, args.prose)
+    print(f"\nlong reply: {len(reply)} chars ({args.lines} code lines, {args.prose} words of prose)")
+    for name, func in (("codeai regexes", codeai_regexes), ("backend regex", backend_regex),
+                       ("scanner", extract_code)):
+        print(f"  {name:<15} {per_call(func, reply, args.runs) * 1e6:8.1f} us/response")
+
+    chunks = [reply[i:i + args.chunk] for i in range(0, len(reply), args.chunk)]
+    scanner = FenceScanner("python")
+    read = 0
+    for chunk in chunks:
+        read += 1
+        if scanner.feed(chunk):
+            break
+    assert scanner.code() == codeai_regexes(reply, "python")
+    print(f"  streamed: stopped after {read} of {len(chunks)} chunks")
+
+
+if __name__ == "__main__":
+    main()
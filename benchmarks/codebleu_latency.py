@@ -0,0 +1,72 @@
+"""
+Latency of the backend's calculate_codebleu versus input size.
+Compares the token-level LCS similarity with the old character-level
+SequenceMatcher it replaced.
+
+Usage:
+    python benchmarks/codebleu_latency.py --sizes 100,300,1000,3000
+"""
+
+import argparse
+import random
+import time
+from difflib import SequenceMatcher
+
+from backend_load import load_backend
+
+LINE_TEMPLATES = [
+    "def {name}(x, y):",
+    "    result = x + y * {n}",
+    "    if result > {n}:",
+    "        return result - {n}",
+    "    for i in range({n}):",
+    "        total += values[i] * {n}",
+    "    print('{name}', result)",
+    "    return result",
+]
+
+
+def make_code(lines: int, seed: int) -> str:
+    rng = random.Random(seed)
+    return "\n".join(
+        rng.choice(LINE_TEMPLATES).format(name=f"fn_{rng.randint(0, 50)}", n=rng.randint(0, 99))
+        for _ in range(lines)
+    )
+
+
+def legacy_sequence_ratio(generated: str, reference: str) -> float:
+    """The character-level similarity used before the token-level rewrite."""
+    return SequenceMatcher(None, generated, reference).ratio()
+
+
+def time_call(func, *args) -> float:
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="calculate_codebleu latency by input size")
+    parser.add_argument("--sizes", default="100,300,1000,3000", help="Comma-separated line counts")
+    parser.add_argument(
+        "--legacy-max-lines",
+        type=int,
+        default=1000,
+        help="Skip the character-level baseline above this many lines",
+    )
+    args = parser.parse_args()
+
+    backend = load_backend(stub_model=None)
+    print(f"{'lines':>7} {'chars':>9} {'codebleu (s)':>13} {'legacy seq (s)':>15}")
+    for lines in (int(x) for x in args.sizes.split(",")):
+        generated, reference = make_code(lines, seed=1), make_code(lines, seed=2)
+        current = time_call(backend.calculate_codebleu, generated, reference, "python")
+        if lines <= args.legacy_max_lines:
+            legacy = f"{time_call(legacy_sequence_ratio, generated, reference):>15.4f}"
+        else:
+            legacy = f"{'skipped':>15}"
+        print(f"{lines:>7} {len(generated):>9} {current:>13.4f} {legacy}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Batch CodeBLEU scoring in-process against worker processes
+(CodeBLEUEvaluator.evaluate_batch / evaluate_corpus with workers=N).
+
+For every BLEU smoothing setting, the per-pair scores and the corpus summary
+from the worker pool must equal the in-process ones: workers score with the
+parent evaluator's settings, not the defaults. Then both are timed.
+
+Usage:
+    python benchmarks/evaluator_batch.py --pairs 400 --workers 2
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "CodeAI"))
+
+from code_evaluator import CodeBLEUEvaluator  # noqa: E402
+
+LINE_TEMPLATES = [
+    "def {name}(x, y=1):",
+    "    result = x + y * {n}",
+    "    if result >= {n} and x != y:",
+    "        return result - {n}",
+    "    for i in range({n}):",
+    "        total += values[i] ** 2",
+    "class Model{n}:",
+]
+
+
+def make_code(lines: int, rng: random.Random) -> str:
+    return "\n".join(
+        rng.choice(LINE_TEMPLATES).format(name=f"fn_{rng.randint(0, 9)}", n=rng.randint(0, 9))
+        for _ in range(rng.randint(1, lines))
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Batch CodeBLEU: in-process vs worker processes")
+    parser.add_argument("--pairs", type=int, default=400)
+    parser.add_argument("--lines", type=int, default=20, help="Maximum lines per sample")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--chunk-size", type=int, default=32)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    pairs = [(make_code(args.lines, rng), make_code(args.lines, rng)) for _ in range(args.pairs)]
+
+    for smoothing in ("add-one", "epsilon", None):
+        evaluator = CodeBLEUEvaluator(bleu_smoothing=smoothing)
+        timings = {}
+        results = {}
+        for workers in (1, args.workers):
+            start = time.perf_counter()
+            scores = list(evaluator.evaluate_batch(pairs, workers=workers, chunk_size=args.chunk_size))
+            summary = evaluator.evaluate_corpus(pairs, workers=workers, chunk_size=args.chunk_size)
+            timings[workers] = time.perf_counter() - start
+            results[workers] = (scores, summary)
+        if results[1] != results[args.workers]:
+            sys.exit(f"smoothing={smoothing}: scores differ between in-process and {args.workers} workers")
+        print(f"smoothing={str(smoothing):8s} mean BLEU {results[1][1]['mean_bleu']:.4f}   "
+              f"in-process {timings[1]:6.2f} s   {args.workers} workers {timings[args.workers]:6.2f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Microbenchmark: per-pair cost of the evaluator's normalization and
+keyword/variable extraction, before and after the precompiled lexer.
+
+Usage:
+    python benchmarks/evaluator_features.py --pairs 2000 --lines 40
+"""
+
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "CodeAI"))
+
+from code_lexer import get_lexer  # noqa: E402
+
+LINE_TEMPLATES = [
+    "def {name}(x, y=1):",
+    "    result = x + y * {n}  # scale",
+    "    if result > {n}:",
+    "    elif result == {n}:",
+    "        return result - {n}",
+    "    for i in range({n}):",
+    "        total = total + values[i]",
+    "    print('{name} # done', result)",
+    "class Model{n}:",
+    "    return result",
+]
+
+
+def make_code(lines: int, rng: random.Random) -> str:
+    return "\n".join(
+        rng.choice(LINE_TEMPLATES).format(name=f"fn_{rng.randint(0, 50)}", n=rng.randint(0, 99))
+        for _ in range(lines)
+    )
+
+
+# --- Previous implementation (multiple regex passes, built per call) ---
+
+def legacy_normalize(code):
+    code = re.sub(r'#.*$', '', code, flags=re.MULTILINE)
+    code = re.sub(r'//.*$', '', code, flags=re.MULTILINE)
+    code = re.sub(r'/\*.*?\*/', '', code, flags=re.DOTALL)
+    lines = [line.strip() for line in code.split('\n') if line.strip()]
+    return '\n'.join(lines)
+
+
+def legacy_keywords(code):
+    keywords = {'def', 'class', 'if', 'elif', 'else', 'for', 'while',
+                'return', 'import', 'from', 'try', 'except', 'with', 'as'}
+    code_lower = code.lower()
+    found = {kw for kw in keywords if kw in code_lower}
+    return found | set(re.findall(r'def\s+(\w+)', code)) | set(re.findall(r'class\s+(\w+)', code))
+
+
+def legacy_variables(code):
+    return set(re.findall(r'(\w+)\s*=', code))
+
+
+def legacy_features(code):
+    normalized = legacy_normalize(code)
+    return normalized, legacy_keywords(normalized), legacy_variables(normalized)
+
+
+def lexer_features(code):
+    lexed = get_lexer("python").lex(code)
+    return lexed.normalized, lexed.keywords | lexed.definitions, lexed.assignments
+
+
+def per_pair_us(func, pairs) -> float:
+    start = time.perf_counter()
+    for generated, reference in pairs:
+        func(generated)
+        func(reference)
+    return (time.perf_counter() - start) / len(pairs) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluator feature extraction microbenchmark")
+    parser.add_argument("--pairs", type=int, default=2000)
+    parser.add_argument("--lines", type=int, default=40, help="Lines per code sample")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    pairs = [(make_code(args.lines, rng), make_code(args.lines, rng)) for _ in range(args.pairs)]
+
+    before = per_pair_us(legacy_features, pairs)
+    after = per_pair_us(lexer_features, pairs)
+    print(f"{args.pairs} pairs x {args.lines} lines (python)")
+    print(f"before (multi-pass regex): {before:8.1f} us/pair")
+    print(f"after  (precompiled lexer): {after:8.1f} us/pair")
+    print(f"speedup: {before / after:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Latency of a single CodeBLEU evaluate() call on a large pair, with the
+tree-sitter AST scoring run one after another or alongside the text-based
+scores (CodeBLEUEvaluator(parallel="threads" / "processes")).
+
+The pair is built from CodeAI's own sources: the reference is every module
+concatenated, the candidate drops every seventh line. Each mode is timed with
+a new reference (nothing cached) and with the reference already prepared.
+Scores must be identical across modes.
+
+Usage:
+    python benchmarks/evaluator_parallel.py --runs 5 --copies 2
+"""
+
+import argparse
+import glob
+import os
+import statistics
+import sys
+import time
+
+CODEAI_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "CodeAI")
+sys.path.insert(0, CODEAI_DIR)
+
+from code_evaluator import CodeBLEUEvaluator  # noqa: E402
+
+
+def make_pair(copies: int):
+    sources = []
+    for path in sorted(glob.glob(os.path.join(CODEAI_DIR, "*.py"))):
+        with open(path, encoding="utf-8") as f:
+            sources.append(f.read())
+    reference = "\n".join(sources * copies)
+    generated = "\n".join(line for i, line in enumerate(reference.splitlines()) if i % 7)
+    return generated, reference
+
+
+def time_mode(mode, generated, reference, runs):
+    cold, warm = [], []
+    result = None
+    for run in range(runs):
+        evaluator = CodeBLEUEvaluator(parallel=mode)
+        if mode is not None:
+            evaluator.evaluate("x = 1", "x = 1")  # start the pool outside the timing
+        # A different trailing comment per call keeps every profile cache
+        # cold, including those of worker processes
+        cold_reference = reference + f"\n# {mode} run {run}\n"
+        start = time.perf_counter()
+        result = evaluator.evaluate(generated + f"\n# {mode} cold {run}\n", cold_reference)
+        cold.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        evaluator.evaluate(generated + f"\n# {mode} warm {run}\n", cold_reference)
+        warm.append(time.perf_counter() - start)
+    return statistics.median(cold), statistics.median(warm), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serial vs parallel CodeBLEU components")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--copies", type=int, default=2, help="Times the sources are repeated")
+    args = parser.parse_args()
+
+    generated, reference = make_pair(args.copies)
+    print(f"pair: {len(generated)} / {len(reference)} chars, {os.cpu_count()} CPUs")
+    baseline = None
+    for mode in (None, "threads", "processes"):
+        cold, warm, result = time_mode(mode, generated, reference, args.runs)
+        scores = {key: round(value, 12) for key, value in result.items()}
+        if baseline is None:
+            baseline = scores
+        elif scores != baseline:
+            sys.exit(f"scores differ in mode {mode}: {scores} vs {baseline}")
+        print(f"{str(mode):10s} new reference {cold * 1000:8.1f} ms   "
+              f"prepared reference {warm * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Cost of running generated code against tests: a fresh `python` subprocess per
+job versus the warm pre-forked pool of CodeAI/execution_evaluator.py.
+
+Both run the same job (define is_prime, then three test functions); results
+must agree.
+
+Usage:
+    python benchmarks/execution_pool.py --jobs 50
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "CodeAI"))
+
+from execution_evaluator import ExecutionEvaluator  # noqa: E402
+
+CODE = '''
+def is_prime(n):
+    if n < 2:
+        return False
+    return all(n % i for i in range(2, int(n ** 0.5) + 1))
+'''
+TESTS = '''
+def test_small():
+    assert is_prime(2) and is_prime(3) and not is_prime(1)
+
+def test_composite():
+    assert not is_prime(91)
+
+def test_large():
+    assert is_prime(7919)
+'''
+RUNNER = CODE + TESTS + '''
+failed = 0
+for name, func in list(globals().items()):
+    if name.startswith("test") and callable(func):
+        try:
+            func()
+        except Exception:
+            failed += 1
+raise SystemExit(failed)
+'''
+
+
+def cold_job() -> bool:
+    return subprocess.run([sys.executable, "-I", "-c", RUNNER], timeout=30).returncode == 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Subprocess per job vs warm sandbox pool")
+    parser.add_argument("--jobs", type=int, default=50)
+    parser.add_argument("--workers", type=int, default=2)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    cold = [cold_job() for _ in range(args.jobs)]
+    cold_time = (time.perf_counter() - start) / args.jobs
+
+    evaluator = ExecutionEvaluator(workers=args.workers)
+    evaluator.evaluate("x = 1", "")  # wait for the workers to start
+    start = time.perf_counter()
+    warm = [evaluator.evaluate(CODE, TESTS)["passed"] for _ in range(args.jobs)]
+    warm_time = (time.perf_counter() - start) / args.jobs
+    evaluator.close()
+
+    if cold != warm or not all(warm):
+        sys.exit(f"results differ: subprocess {cold[:3]}..., pool {warm[:3]}...")
+    print(f"subprocess per job {cold_time * 1000:7.1f} ms")
+    print(f"warm pool          {warm_time * 1000:7.1f} ms   speedup {cold_time / warm_time:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+k samples for one query: k sequential generate_code calls versus
+CodeGenerator.generate_samples, which asks for all k in one request (n=k) or,
+when the API rejects n, sends k concurrent requests.
+
+Runs against the local stub LLM server. Prompt tokens are the stub's usage
+counts as recorded in the shared metrics; the stub reports 50 per request.
+
+Usage:
+    python benchmarks/multi_sample.py --k 8 --latency 0.3
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "CodeAI"))
+
+from stub_llm import StubConfig, StubServer  # noqa: E402
+
+QUERY = "Create a Python function to calculate factorial"
+
+
+def measure(config, run):
+    from llm_common import metrics
+    requests, tokens = config.requests, metrics.LLM_PROMPT_TOKENS.snapshot(
+        service="codeai", model="codestral-latest") or {"sum": 0}
+    start = time.perf_counter()
+    samples = run()
+    elapsed = time.perf_counter() - start
+    after = metrics.LLM_PROMPT_TOKENS.snapshot(service="codeai", model="codestral-latest")
+    return samples, elapsed, config.requests - requests, after["sum"] - tokens["sum"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sequential samples vs one n=k request")
+    parser.add_argument("--k", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.3, help="Stub time to first byte (s)")
+    args = parser.parse_args()
+
+    config = StubConfig(latency=args.latency)
+    with StubServer(config) as server:
+        os.environ["MISTRAL_SERVER_URL"] = server.url
+        from code_generator import CodeGenerator
+        from sampling import group_samples
+
+        generator = CodeGenerator(api_key="stub")
+        # Import the sync and async client stacks outside the timings
+        generator.generate_code(QUERY, "python", use_cache=False)
+        generator.generate_many([QUERY], "python", use_cache=False)
+
+        runs = {
+            "sequential": lambda: [generator.generate_code(QUERY, "python", use_cache=False)
+                                   for _ in range(args.k)],
+            "one request (n)": lambda: generator.generate_samples(QUERY, n=args.k, language="python",
+                                                                  use_cache=False),
+        }
+        for name, run in runs.items():
+            samples, elapsed, requests, tokens = measure(config, run)
+            print(f"{name:18s} {elapsed * 1000:8.1f} ms  {requests:3d} requests  "
+                  f"{tokens:6.0f} prompt tokens  {len(samples)} samples, "
+                  f"{len(group_samples(samples))} unique")
+
+        config.accept_n = False
+        fallback = CodeGenerator(api_key="stub")
+        samples, elapsed, requests, tokens = measure(
+            config, lambda: fallback.generate_samples(QUERY, n=args.k, language="python",
+                                                      use_cache=False, max_concurrency=args.k))
+        print(f"{'fallback (n=422)':18s} {elapsed * 1000:8.1f} ms  {requests:3d} requests  "
+              f"{tokens:6.0f} prompt tokens  {len(samples)} samples")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+"""
+Offline benchmark suite: drives the real code paths against a local stub
+LLM server (see stub_llm.py), so no API keys or network access are needed.
+
+Scenarios:
+- codegen:        CodeGenerator.generate_code (Mistral client -> stub)
+- assistant:      AICodeAssistant.generate_and_evaluate
+- generate-code:  FastAPI POST /generate-code (Gemini REST client -> stub)
+- validate-code:  FastAPI POST /validate-code (no LLM call)
+- chat:           FastAPI POST /chat
+
+Each scenario runs at every concurrency level and reports p50/p95/p99
+latency and requests/second as JSON, for tracking regressions.
+
+Usage:
+    python benchmarks/offline_suite.py --latency 0.1 --requests 40 --levels 1,4,16
+    python benchmarks/offline_suite.py --scenarios chat,validate-code --output results.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+
+from backend_load import load_backend
+from stub_llm import DEFAULT_CODE, StubConfig, StubServer
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "CodeAI"))
+
+SCENARIOS = ("codegen", "assistant", "generate-code", "validate-code", "chat")
+QUERY = "Create a Python function to calculate factorial"
+
+
+def percentile(sorted_values, q: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(round(q / 100 * len(sorted_values) + 0.5)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def summarize(latencies, elapsed: float, errors: int) -> dict:
+    values = sorted(latencies)
+    return {
+        "requests": len(values) + errors,
+        "errors": errors,
+        "p50_ms": round(percentile(values, 50) * 1000, 2),
+        "p95_ms": round(percentile(values, 95) * 1000, 2),
+        "p99_ms": round(percentile(values, 99) * 1000, 2),
+        "requests_per_second": round(len(values) / elapsed, 2) if elapsed else 0.0,
+    }
+
+
+def run_threaded(call, concurrency: int, total: int) -> dict:
+    """Run a blocking call `total` times with `concurrency` threads."""
+    def timed(i):
+        start = time.perf_counter()
+        try:
+            call(i)
+        except Exception:
+            return None
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(timed, range(total)))
+    elapsed = time.perf_counter() - start
+    latencies = [r for r in results if r is not None]
+    return summarize(latencies, elapsed, total - len(latencies))
+
+
+async def run_http(app, method: str, path: str, body_for, concurrency: int, total: int) -> dict:
+    """Send `total` requests to the ASGI app with `concurrency` in flight."""
+    transport = httpx.ASGITransport(app=app)
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, errors = [], 0
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        async def one(i):
+            nonlocal errors
+            async with semaphore:
+                start = time.perf_counter()
+                response = await client.request(method, path, json=body_for(i))
+                # The backend reports failures in a 200 body
+                if response.status_code != 200 or response.json().get("status") == "error":
+                    errors += 1
+                else:
+                    latencies.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(total)))
+        elapsed = time.perf_counter() - start
+
+    return summarize(latencies, elapsed, errors)
+
+
+def codeai_scenarios(server_url: str):
+    """Blocking calls into the CodeAI package, keyed by scenario name."""
+    from mistralai import Mistral
+    from code_generator import CodeGenerator
+    from main import AICodeAssistant
+
+    def stub_client():
+        return Mistral(api_key="stub", server_url=server_url)
+
+    generator = CodeGenerator(api_key="stub")
+    generator.client = stub_client()
+
+    assistant = AICodeAssistant(api_key="stub")
+    assistant.generator.client = stub_client()
+
+    return {
+        "codegen": lambda i: generator.generate_code(f"{QUERY} #{i}", "python", use_cache=False),
+        "assistant": lambda i: assistant.generate_and_evaluate(f"{QUERY} #{i}", DEFAULT_CODE, "python"),
+    }
+
+
+def backend_scenarios(server_url: str):
+    """HTTP calls into the Chatbot backend, keyed by scenario name."""
+    import google.generativeai as genai
+
+    # Queries repeat at every concurrency level; with the result cache on,
+    # every level after the first would measure cache hits
+    os.environ["GENERATION_CACHE_TTL"] = "0"
+    backend = load_backend(stub_model=None)
+    genai.configure(api_key="stub", transport="rest", client_options={"api_endpoint": server_url})
+    backend.model = backend.CODE_PROMPT.build_model("gemini-2.5-flash")
+    backend.chat_model = backend.CHAT_PROMPT.build_model("gemini-2.5-flash")
+
+    return backend.app, {
+        "generate-code": ("POST", "/generate-code",
+                          lambda i: {"query": f"{QUERY} #{i}", "language": "python"}),
+        "validate-code": ("POST", "/validate-code",
+                          lambda i: {"generated_code": DEFAULT_CODE + f"# {i}\n",
+                                     "reference_code": DEFAULT_CODE, "language": "python"}),
+        "chat": ("POST", "/chat", lambda i: {"message": f"hello {i}"}),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline benchmark suite against a stub LLM server")
+    parser.add_argument("--latency", type=float, default=0.1, help="Stub time to first byte (s)")
+    parser.add_argument("--tokens-per-second", type=float, default=0.0,
+                        help="Stub generation speed (0 = instant)")
+    parser.add_argument("--completion-tokens", type=int, default=60)
+    parser.add_argument("--requests", type=int, default=32, help="Requests per scenario and level")
+    parser.add_argument("--levels", default="1,4,16", help="Comma-separated concurrency levels")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS),
+                        help=f"Comma-separated subset of: {', '.join(SCENARIOS)}")
+    parser.add_argument("--output", help="Write JSON results to this file instead of stdout")
+    args = parser.parse_args()
+
+    scenarios = [s for s in args.scenarios.split(",") if s]
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+    levels = [int(x) for x in args.levels.split(",")]
+
+    config = StubConfig(args.latency, args.tokens_per_second, args.completion_tokens)
+    results = {
+        "config": {
+            "latency": args.latency,
+            "tokens_per_second": args.tokens_per_second,
+            "completion_tokens": args.completion_tokens,
+            "requests": args.requests,
+            "python": platform.python_version(),
+        },
+        "scenarios": {},
+    }
+
+    with StubServer(config) as server:
+        blocking = codeai_scenarios(server.url) if {"codegen", "assistant"} & set(scenarios) else {}
+        app, http = backend_scenarios(server.url) if set(scenarios) & {"generate-code", "validate-code", "chat"} else (None, {})
+
+        for name in scenarios:
+            per_level = {}
+            for level in levels:
+                if name in blocking:
+                    stats = run_threaded(blocking[name], level, args.requests)
+                else:
+                    method, path, body_for = http[name]
+                    stats = asyncio.run(run_http(app, method, path, body_for, level, args.requests))
+                per_level[str(level)] = stats
+                print(f"{name:>14} c={level:<3} p50={stats['p50_ms']:>8}ms "
+                      f"p99={stats['p99_ms']:>8}ms {stats['requests_per_second']:>8} req/s",
+                      file=sys.stderr)
+            results["scenarios"][name] = per_level
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Prompt size per request: the backend's templates (Chatbot_LLM/Backend/prompts.py)
+against the prompts it used to build inline, where every request carried the
+full instruction block in its user message (and /chat the message twice).
+
+Sizes are bytes and estimated tokens (~4 characters per token) of everything
+sent: system instruction plus user prompt. Real counts per template are on the
+backend's /metrics (prompt_template_tokens), including how many Gemini served
+from its context cache.
+
+Usage:
+    python benchmarks/prompt_tokens.py --query "Reverse a linked list"
+"""
+
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Chatbot_LLM", "Backend"))
+
+from prompts import CHAT_PROMPT, CODE_PROMPT, estimate_tokens  # noqa: E402
+
+OLD_CHAT = """Please provide a clear, well-organized response to: "{message}"
+
+CRITICAL FORMATTING RULES - FOLLOW THESE EXACTLY:
+• Use **bold** for important terms and headings
+• Use ### for main section headings
+• Use ## for subsection headings
+• Use numbered lists (1. 2. 3.) for steps
+• Use proper paragraph breaks with blank lines
+• For code blocks, use ```python and ``` with proper indentation
+• Keep technical explanations simple but accurate and short
+• Structure responses with clear sections
+
+STRICTLY AVOID:
+• Using *• combinations (this creates ugly formatting)
+• Random asterisks anywhere in text
+• Using * for bullet points
+• Poorly formatted lists
+• Walls of text without breaks
+• Any markdown syntax that creates visual clutter
+• Inconsistent indentation in code blocks
+
+For code explanations:
+• Use clear numbered sections (1. 2. 3.)
+• Explain each part step by step
+• Use proper code block formatting with ```python
+• Keep code indentation clean and readable
+• Use bullet points for detailed explanations within sections
+
+Response Structure:
+1. Use numbered sections for main parts
+2. Explain code components easily
+3. Include practical examples where relevant
+
+Question: {message}"""
+
+OLD_CODE = """You are an expert code generation AI. Generate ONLY the code without any explanations or comments.
+        
+User Request: {query}
+Language: {language}
+
+Requirements:
+1. Return ONLY the code - no explanations, no markdown, no text
+2. Make the code production-ready and well-structured
+3. Include proper error handling
+4. Use best practices for the {language} language
+5. If applicable, include comments only for complex logic
+
+Generate the code now:"""
+
+
+def size(*parts):
+    text = "".join(parts)
+    return len(text.encode("utf-8")), sum(estimate_tokens(part) for part in parts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prompt size per request: templates vs inline prompts")
+    parser.add_argument("--query", default="Write a function that reverses a linked list")
+    parser.add_argument("--language", default="python")
+    args = parser.parse_args()
+
+    rows = (
+        ("chat", size(OLD_CHAT.format(message=args.query)),
+         size(CHAT_PROMPT.system_instruction, CHAT_PROMPT.render(message=args.query))),
+        ("generate-code", size(OLD_CODE.format(query=args.query, language=args.language)),
+         size(CODE_PROMPT.system_instruction,
+              CODE_PROMPT.render(query=args.query, language=args.language))),
+    )
+    for name, (old_bytes, old_tokens), (new_bytes, new_tokens) in rows:
+        print(f"{name:14s} before {old_bytes:5d} B ~{old_tokens:4d} tokens   "
+              f"after {new_bytes:5d} B ~{new_tokens:4d} tokens   "
+              f"saved {1 - new_tokens / old_tokens:.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Latency and output tokens of code generation with trailing prose, before and
+after stop sequences and adaptive output budgets.
+
+The stub answers with a code block followed by `--prose-tokens` of
+explanation, generated at `--tokens-per-second`. "before" sends the request
+the way the services used to (CodeAI: max_tokens=4000, no stop; backend: no
+generation config); "after" goes through CodeGenerator.generate_code and the
+backend's /generate-code (non-streaming and streaming).
+
+Usage:
+    python benchmarks/stop_sequences.py --prose-tokens 300 --tokens-per-second 300
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+import httpx
+
+from backend_load import load_backend
+from stub_llm import StubConfig, StubServer
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "CodeAI"))
+
+QUERY = "Create a Python function to calculate factorial"
+
+
+def timed(call):
+    start = time.perf_counter()
+    result = call()
+    return result, time.perf_counter() - start
+
+
+def codeai(server_url):
+    os.environ["MISTRAL_SERVER_URL"] = server_url
+    from code_generator import CodeGenerator
+
+    generator = CodeGenerator(api_key="stub")
+    old_request, _ = generator._build_request(QUERY, "python")
+    old_request = {key: value for key, value in old_request.items() if key != "stop"}
+    old_request["max_tokens"] = 4000
+    generator.client.chat.complete(**old_request)  # connect outside the timings
+
+    before, before_time = timed(lambda: generator.client.chat.complete(**old_request))
+    _, after_time = timed(lambda: generator.generate_code(QUERY, "python", use_cache=False))
+    return before.usage.completion_tokens, before_time, after_time
+
+
+async def backend(server_url):
+    import google.generativeai as genai
+
+    module = load_backend(stub_model=None)
+    genai.configure(api_key="stub", transport="rest", client_options={"api_endpoint": server_url})
+    module.model = module.CODE_PROMPT.build_model("gemini-2.5-flash")
+    module.GENERATION_CACHE_TTL = 0
+    module.GEMINI_OUTPUT_BUDGETS = True
+    prompt = module.CODE_PROMPT.render(query=QUERY, language="python")
+
+    transport = httpx.ASGITransport(app=module.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://backend", timeout=60) as client:
+        await module.generate_content(prompt)  # connect outside the timings
+        start = time.perf_counter()
+        await module.generate_content(prompt)
+        before = time.perf_counter() - start
+
+        times = []
+        for i, stream in enumerate((False, True)):
+            start = time.perf_counter()
+            response = await client.post("/generate-code", json={
+                "query": f"{QUERY} #{i}", "language": "python", "stream": stream})
+            assert "factorial" in response.text, response.text
+            times.append(time.perf_counter() - start)
+    return before, times
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stop sequences and output budgets vs trailing prose")
+    parser.add_argument("--prose-tokens", type=int, default=300)
+    parser.add_argument("--tokens-per-second", type=float, default=300.0)
+    parser.add_argument("--latency", type=float, default=0.05)
+    args = parser.parse_args()
+
+    config = StubConfig(args.latency, args.tokens_per_second, prose_tokens=args.prose_tokens)
+    with StubServer(config) as server:
+        tokens, before, after = codeai(server.url)
+        print(f"CodeAI generate_code    before {before * 1000:7.1f} ms ({tokens} tokens)   "
+              f"after {after * 1000:7.1f} ms ({config.completion_tokens} tokens)")
+        before, (plain, stream) = asyncio.run(backend(server.url))
+        print(f"backend /generate-code  before {before * 1000:7.1f} ms   "
+              f"after {plain * 1000:7.1f} ms   streamed {stream * 1000:7.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,257 @@
+"""
+Local stub LLM server for offline benchmarks.
+
+Speaks enough of two HTTP APIs to drive the real client libraries:
+- Mistral chat completions: POST /v1/chat/completions
+- Gemini generate_content (REST transport):
+  POST /v1beta/models/{model}:generateContent and :streamGenerateContent
+
+Each response takes `latency` seconds plus `completion_tokens / tokens_per_second`,
+so both time-to-first-byte and generation throughput can be controlled.
+`prose_tokens` adds an explanation after the code block, like models that
+ignore "code only"; stop sequences and output token limits in the request
+are applied to it (Mistral `stop`/`max_tokens`, Gemini `stopSequences`/`maxOutputTokens`).
+
+Usage (standalone):
+    python benchmarks/stub_llm.py --port 8099 --latency 0.2 --tokens-per-second 200
+"""
+
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_CODE = '''def factorial(n):
+    if n <= 1:
+        return 1
+    return n * factorial(n - 1)
+'''
+
+
+class StubConfig:
+    """Timing and content of stub responses."""
+
+    def __init__(self, latency: float = 0.2, tokens_per_second: float = 0.0,
+                 completion_tokens: int = 60, code: str = DEFAULT_CODE, accept_n: bool = True,
+                 prose_tokens: int = 0):
+        self.latency = latency
+        self.tokens_per_second = tokens_per_second
+        self.completion_tokens = completion_tokens
+        self.code = code
+        self.prose_tokens = prose_tokens
+        # False: reject requests with n > 1 like an API without multi-sampling
+        self.accept_n = accept_n
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    def count(self):
+        with self._lock:
+            self.requests += 1
+
+    def generation_time(self, tokens: int) -> float:
+        if self.tokens_per_second <= 0:
+            return 0.0
+        return tokens / self.tokens_per_second
+
+    @property
+    def text(self) -> str:
+        return f"```python\n{self.code}```"
+
+    def reply(self, stop=(), max_tokens=None):
+        """(text, completion tokens, finished at a limit) after stop sequences and max_tokens"""
+        text, tokens = self.text, self.completion_tokens
+        if self.prose_tokens:
+            prose = "\n".join(["This function explains itself at some length."] * (self.prose_tokens // 12 + 1))
+            text += "\n\n" + prose[:self.prose_tokens * 4]
+            tokens += self.prose_tokens
+        for sequence in stop or ():
+            cut = text.find(sequence)
+            if cut >= 0:
+                # Text up to the stop sequence, about 4 characters per token
+                tokens = min(tokens, self.completion_tokens + max(0, cut - len(self.text)) // 4)
+                text = text[:cut]
+        if max_tokens and tokens > max_tokens:
+            text = text[:len(text) * max_tokens // tokens]
+            return text, max_tokens, True
+        return text, tokens, False
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body are separate writes; without this Nagle + delayed ACK
+    # add ~40ms to every keep-alive response
+    disable_nagle_algorithm = True
+    config: StubConfig = None  # set on the server-specific subclass
+
+    def log_message(self, format, *args):
+        pass  # keep benchmark output clean
+
+    def _read_json(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+        return json.loads(body or b"{}")
+
+    def _send_json(self, payload, status=200):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        self.config.count()
+        request = self._read_json()
+        path = self.path.split("?", 1)[0]
+
+        if path.endswith("/chat/completions"):
+            self._mistral_chat(request)
+        elif path.endswith(":generateContent"):
+            self._gemini_generate(request)
+        elif path.endswith(":streamGenerateContent"):
+            self._gemini_stream(request)
+        else:
+            self._send_json({"error": {"message": f"unknown path {path}"}}, status=404)
+
+    def _mistral_chat(self, request):
+        config = self.config
+        if (request.get("n") or 1) > 1 and not config.accept_n:
+            self._send_json({"object": "error", "message": "n is not supported"}, status=422)
+            return
+        stop = request.get("stop")
+        text, tokens, truncated = config.reply([stop] if isinstance(stop, str) else stop,
+                                               request.get("max_tokens"))
+        time.sleep(config.latency + config.generation_time(tokens))
+        choices = [
+            {
+                "index": i,
+                "finish_reason": "length" if truncated else "stop",
+                "message": {"role": "assistant", "content": text},
+            }
+            for i in range(request.get("n") or 1)
+        ]
+        self._send_json({
+            "id": "stub",
+            "object": "chat.completion",
+            "model": request.get("model", "stub"),
+            "created": int(time.time()),
+            "usage": {
+                "prompt_tokens": 50,
+                "completion_tokens": tokens * len(choices),
+                "total_tokens": 50 + tokens * len(choices),
+            },
+            "choices": choices,
+        })
+
+    def _gemini_reply(self, request):
+        generation_config = request.get("generationConfig") or {}
+        return self.config.reply(generation_config.get("stopSequences"),
+                                 generation_config.get("maxOutputTokens"))
+
+    def _gemini_candidate(self, text, tokens, finish_reason="STOP"):
+        candidate = {"content": {"parts": [{"text": text}], "role": "model"}, "index": 0}
+        if finish_reason:
+            candidate["finishReason"] = finish_reason
+        return {
+            "candidates": [candidate],
+            "usageMetadata": {
+                "promptTokenCount": 50,
+                "candidatesTokenCount": tokens,
+                "totalTokenCount": 50 + tokens,
+            },
+        }
+
+    def _gemini_generate(self, request):
+        config = self.config
+        text, tokens, truncated = self._gemini_reply(request)
+        time.sleep(config.latency + config.generation_time(tokens))
+        self._send_json(self._gemini_candidate(text, tokens, "MAX_TOKENS" if truncated else "STOP"))
+
+    def _gemini_stream(self, request):
+        # The REST transport reads the stream as one JSON array of responses
+        config = self.config
+        time.sleep(config.latency)
+        text, tokens, truncated = self._gemini_reply(request)
+        lines = text.splitlines(keepends=True)
+        per_line = config.generation_time(tokens) / max(1, len(lines))
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        def write_chunk(data: str):
+            raw = data.encode("utf-8")
+            self.wfile.write(f"{len(raw):x}\r\n".encode("ascii") + raw + b"\r\n")
+            self.wfile.flush()
+
+        write_chunk("[")
+        for i, line in enumerate(lines):
+            if per_line:
+                time.sleep(per_line)
+            finish_reason = None
+            if i == len(lines) - 1:
+                finish_reason = "MAX_TOKENS" if truncated else "STOP"
+            try:
+                write_chunk(("," if i else "") + json.dumps(self._gemini_candidate(line, tokens, finish_reason)))
+            except OSError:
+                return  # the client stopped reading
+        write_chunk("]")
+        self.wfile.write(b"0\r\n\r\n")
+
+
+class _StubHTTPServer(ThreadingHTTPServer):
+    # socketserver's default backlog of 5 drops bursts of new connections,
+    # which then wait a second for the SYN retransmit
+    request_queue_size = 128
+    daemon_threads = True
+
+
+class StubServer:
+    """Runs the stub in a background thread. Use as a context manager."""
+
+    def __init__(self, config: StubConfig, host: str = "127.0.0.1", port: int = 0):
+        handler = type("BoundStubHandler", (StubHandler,), {"config": config})
+        self.config = config
+        self.httpd = _StubHTTPServer((host, port), handler)
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stub Mistral/Gemini server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--latency", type=float, default=0.2, help="Seconds before the first byte")
+    parser.add_argument("--tokens-per-second", type=float, default=0.0,
+                        help="Generation speed (0 = instant)")
+    parser.add_argument("--completion-tokens", type=int, default=60)
+    parser.add_argument("--prose-tokens", type=int, default=0,
+                        help="Explanation generated after the code block")
+    args = parser.parse_args()
+
+    config = StubConfig(args.latency, args.tokens_per_second, args.completion_tokens,
+                        prose_tokens=args.prose_tokens)
+    with StubServer(config, args.host, args.port) as server:
+        print(f"Stub LLM server on {server.url} (Ctrl+C to stop)")
+        try:
+            server.thread.join()
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,5 @@
+"""
+Modules shared by the Chatbot backend and CodeAI.
+The repository root is put on sys.path once per service: by
+CodeAI/shared_modules.py and by the backend's main.py.
+"""
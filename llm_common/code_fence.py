@@ -0,0 +1,210 @@
+"""
+Code fence extraction
+One single-pass scanner for the ``` code blocks in LLM responses, shared by
+the Chatbot backend and CodeAI. It reads a whole response or streamed chunks,
+and stops reading once it has the block it is looking for.
+"""
+
+from typing import Iterable, List, NamedTuple, Optional, Tuple, Union
+
+FENCE = "```"
+
+# Fence info strings that name the same language, by the name both services use
+LANGUAGE_ALIASES = {
+    "python": ("python", "py", "python3", "py3"),
+    "javascript": ("javascript", "js", "jsx", "node", "mjs"),
+    "typescript": ("typescript", "ts", "tsx"),
+    "java": ("java",),
+    "cpp": ("cpp", "c++", "cc", "cxx", "hpp", "h++"),
+    "c": ("c", "h"),
+    "csharp": ("csharp", "cs", "c#"),
+    "go": ("go", "golang"),
+    "rust": ("rust", "rs"),
+}
+_CANONICAL = {alias: name for name, aliases in LANGUAGE_ALIASES.items() for alias in aliases}
+
+
+def normalize_language(tag: Optional[str]) -> str:
+    """Canonical language name for a fence tag or language option ("" if none)."""
+    if not tag:
+        return ""
+    tag = tag.strip().lower()
+    return _CANONICAL.get(tag, tag)
+
+
+class CodeBlock(NamedTuple):
+    """One fenced block: canonical language ("" if untagged), code, and whether it was closed."""
+    language: str
+    code: str
+    closed: bool
+
+
+class FenceScanner:
+    """
+    Incremental scanner for fenced code blocks.
+
+    Text is read once, left to right, by jumping from one fence to the next
+    (str.find); only the unfinished last line of a chunk is kept for the
+    next. Outside a block, a ``` opens one and the word after it is the
+    language tag. Inside a block, a line that starts or ends with ``` closes
+    it. "```python x = 1```" on one line is a block of its own.
+
+    The scan is done at the first closed block that is tagged with the wanted
+    language or untagged; a block in another language (say, a shell command
+    before the code) does not end it.
+    """
+
+    def __init__(self, language: Optional[str] = None):
+        self.language = normalize_language(language)
+        self.blocks: List[CodeBlock] = []
+        self.done = False
+        self._pending = ""
+        self._block_language: Optional[str] = None  # set while inside a block
+        self._block_text: List[str] = []
+
+    def feed(self, chunk: str) -> bool:
+        """Add streamed text; True once the wanted block is complete."""
+        if self.done:
+            return True
+        text = self._pending + chunk if self._pending else chunk
+        pos = 0
+        while True:
+            if self._block_language is None:
+                start = text.find(FENCE, pos)
+                end = text.find("\n", start) if start >= 0 else -1
+                if end < 0:
+                    # Keep the last line: a fence may be split across chunks
+                    pos = max(pos, text.rfind("\n", pos, start if start >= 0 else len(text)) + 1)
+                    break
+                pos = end + 1
+                if self._open(text[start + len(FENCE):end]):
+                    return True
+            else:
+                line_start, line_end = self._closing_line(text, pos)
+                if line_end < 0:
+                    # No complete closing line yet
+                    cut = max(pos, text.rfind("\n", pos) + 1)
+                    self._block_text.append(text[pos:cut])
+                    pos = cut
+                    break
+                self._block_text.append(text[pos:line_start])
+                line = text[line_start:line_end]
+                if not line.lstrip().startswith(FENCE):
+                    # Code running straight into the fence
+                    self._block_text.append(line[:line.rfind(FENCE)])
+                pos = line_end + 1
+                language, self._block_language = self._block_language, None
+                if self._close(language, "".join(self._block_text)):
+                    return True
+        self._pending = text[pos:]
+        return False
+
+    def finish(self) -> List[CodeBlock]:
+        """End of input: scan the last line and keep an open block as unterminated."""
+        if not self.done:
+            if self._pending:
+                self.feed("\n")
+            if self._block_language is not None and not self.done:
+                self.blocks.append(CodeBlock(self._block_language, _clean("".join(self._block_text)), False))
+                self._block_language = None
+        return self.blocks
+
+    def best(self) -> Optional[CodeBlock]:
+        """
+        The block to use: the first one in the wanted language or untagged,
+        preferring closed blocks to an unterminated one (a stop sequence or
+        the output limit cut it off), else the first block of any language.
+        """
+        wanted = [block for block in self.blocks if self.wants(block.language)]
+        for block in wanted:
+            if block.closed:
+                return block
+        if wanted:
+            return wanted[0]
+        return self.blocks[0] if self.blocks else None
+
+    def code(self) -> Optional[str]:
+        """Code of the best block, finishing the scan if needed (None if there are no fences)."""
+        if not self.done:
+            self.finish()
+        block = self.best()
+        return block.code if block is not None else None
+
+    def wants(self, language: str) -> bool:
+        """True for a block language this scan accepts: the wanted one, or untagged."""
+        return not language or not self.language or language == self.language
+
+    def _open(self, info: str) -> bool:
+        """Handle the rest of a line after an opening fence."""
+        info = info.strip()
+        end = info.find(FENCE)
+        if end >= 0:
+            # The whole block on one line; a leading word is a tag only if it names a language
+            body = info[:end].strip()
+            tag, _, code = body.partition(" ")
+            if code and normalize_language(tag) in LANGUAGE_ALIASES:
+                return self._close(normalize_language(tag), code)
+            return self._close("", body)
+        self._block_language = normalize_language(info.split(None, 1)[0] if info else "")
+        self._block_text = []
+        return False
+
+    @staticmethod
+    def _closing_line(text: str, pos: int) -> Tuple[int, int]:
+        """Bounds of the first complete line from pos that starts or ends with a fence (end -1 if none)."""
+        fence = text.find(FENCE, pos)
+        while fence >= 0:
+            line_start = text.rfind("\n", pos, fence) + 1 or pos
+            line_end = text.find("\n", fence)
+            if line_end < 0:
+                break
+            line = text[line_start:line_end].strip()
+            if line.startswith(FENCE) or line.endswith(FENCE):
+                return line_start, line_end
+            fence = text.find(FENCE, line_end)
+        return pos, -1
+
+    def _close(self, language: str, code: str) -> bool:
+        self.blocks.append(CodeBlock(language, _clean(code), True))
+        self.done = self.wants(language)
+        return self.done
+
+
+def _clean(code: str) -> str:
+    if "\r" in code:
+        code = code.replace("\r\n", "\n")
+    return code.strip("\n").rstrip()
+
+
+def extract_code(source: Union[str, Iterable[str]], language: Optional[str] = None) -> str:
+    """
+    Extract the code from an LLM response.
+
+    Args:
+        source: The response text, or an iterable of streamed chunks (read
+                only up to the end of the wanted block)
+        language: Preferred block language; aliases such as "py" or "c++" match
+
+    Returns:
+        The code of the best block (see FenceScanner.best), or the whole
+        response stripped if it has no fences
+    """
+    if isinstance(source, str):
+        if FENCE not in source:
+            return source.strip()
+        chunks: Iterable[str] = (source,)
+        text = source
+    else:
+        chunks, text = source, None
+
+    scanner = FenceScanner(language)
+    seen = []
+    for chunk in chunks:
+        if text is None:
+            seen.append(chunk)
+        if scanner.feed(chunk):
+            break
+    code = scanner.code()
+    if code is not None:
+        return code
+    return (text if text is not None else "".join(seen)).strip()
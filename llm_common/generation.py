@@ -0,0 +1,84 @@
+"""
+Generation limits
+Output token budgets and stop sequences for code generation, shared by the
+Chatbot backend and CodeAI.
+
+Models often add prose after the closing code fence, which code extraction
+throws away. The stop sequence ends generation at that fence, and the budget
+is sized from the request instead of a fixed maximum. A response that runs
+into its budget is requested again with the full cap, so a small budget costs
+a retry, never truncated code.
+"""
+
+from typing import Optional
+
+from .code_fence import FenceScanner
+
+# A closing fence followed by more text. The API drops the matched text, which
+# leaves the block unterminated; llm_common.code_fence extracts it as is. It
+# also matches the close of a block in another language (a shell command
+# before the code) and an unlabeled opening fence after prose. Prompts ask
+# for one block tagged with the language, and stop_cut_before_code() catches
+# replies that were cut anywhere else.
+CODE_STOP_SEQUENCES = ("\n```\n",)
+
+# Budget = (floor + tokens per query token * query tokens) * language factor
+BUDGET_FLOOR = 512
+TOKENS_PER_QUERY_TOKEN = 24
+LANGUAGE_FACTORS = {
+    "python": 1.0,
+    "javascript": 1.1,
+    "typescript": 1.2,
+    "go": 1.2,
+    "cpp": 1.3,
+    "rust": 1.3,
+    "java": 1.4,
+}
+
+
+def output_token_budget(query: str, language: Optional[str], cap: int, reserve: int = 0) -> int:
+    """
+    Output tokens to allow for a code answer.
+
+    Longer requests describe more code, and verbose languages need more
+    tokens for the same program.
+
+    Args:
+        query: The user's request
+        language: Target language (unknown languages count as 1.2)
+        cap: Upper bound (also used for the retry after hitting the budget)
+        reserve: Tokens the model spends before the answer (e.g. thinking)
+
+    Returns:
+        Token budget, at most cap
+    """
+    query_tokens = len(query) // 4 + 1
+    factor = LANGUAGE_FACTORS.get((language or "").lower(), 1.2)
+    budget = (BUDGET_FLOOR + TOKENS_PER_QUERY_TOKEN * query_tokens) * factor + reserve
+    return min(cap, int(budget))
+
+
+def stop_cut_before_code(text: str, language: Optional[str]) -> bool:
+    """
+    True if a reply generated with CODE_STOP_SEQUENCES was cut before its
+    code, so it should be requested again without them.
+
+    Prompts ask for one block tagged with the language, so a reply the stop
+    ended at the right place holds a block in that language (or an untagged
+    one). A reply with only other languages' blocks ended after one of those.
+    A reply without fences is bare code, which is kept, unless it is empty
+    or ends like an introduction ("Here is the code:"): then it ended at an
+    unlabeled opening fence.
+
+    Args:
+        text: Reply text (the API removes the matched stop sequence)
+        language: Language the code was requested in
+    """
+    scanner = FenceScanner(language)
+    scanner.feed(text)
+    scanner.finish()
+    block = scanner.best()
+    if block is None:
+        text = text.rstrip()
+        return not text or text.endswith(":")
+    return not scanner.wants(block.language)
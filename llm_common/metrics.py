@@ -0,0 +1,230 @@
+"""
+Metrics
+Prometheus-style counters and histograms shared by the Chatbot backend and CodeAI.
+
+Recording is an in-memory update under a lock (about a microsecond), so it
+stays on in production; render() produces the Prometheus text format for a
+/metrics endpoint. Metrics are per process: worker processes keep their own.
+"""
+
+import threading
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from contextlib import contextmanager
+from time import perf_counter
+from typing import Dict, Iterable, Optional, Tuple
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Bucket upper bounds
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+FAST_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.5)
+TOKEN_BUCKETS = (16, 32, 64, 128, 256, 512, 1024, 2048, 4096, 8192, 16384, 32768)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[object, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric(ABC):
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values: Dict[Tuple[object, ...], object] = {}
+
+    def _key(self, labels: Dict[str, object]) -> Tuple[object, ...]:
+        # Label values are converted to strings only when rendering
+        try:
+            if len(labels) == len(self.labelnames):
+                return tuple([labels[name] for name in self.labelnames])
+        except KeyError:
+            pass
+        raise ValueError(f"{self.name} takes labels {self.labelnames}, got {tuple(labels)}")
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            items = sorted(self._values.items(), key=lambda item: tuple(map(str, item[0])))
+        for key, value in items:
+            lines.extend(self._sample_lines(key, value))
+        return "\n".join(lines)
+
+    @abstractmethod
+    def _sample_lines(self, key, value):
+        """Prometheus sample lines for one label combination."""
+
+
+class Counter(_Metric):
+    """Monotonically increasing count, e.g. cache hits or errors."""
+
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def _sample_lines(self, key, value):
+        yield f"{self.name}{_format_labels(self.labelnames, key)} {_format_number(value)}"
+
+
+class Histogram(_Metric):
+    """Distribution of observed values (latencies, token counts) over fixed buckets."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                 buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # Per-bucket (not cumulative) counts, then sum and count
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the duration of the with block in seconds."""
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(perf_counter() - start, **labels)
+
+    def snapshot(self, **labels) -> Optional[Dict[str, float]]:
+        """{"count", "sum"} for one label set, or None if nothing was observed."""
+        with self._lock:
+            state = self._values.get(self._key(labels))
+            return None if state is None else {"count": state[2], "sum": state[1]}
+
+    def _sample_lines(self, key, state):
+        counts, total, count = state
+        cumulative = 0
+        for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+            cumulative += bucket_count
+            le = 'le="' + _format_number(float(bound)) + '"'
+            yield f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}"
+        labels = _format_labels(self.labelnames, key)
+        yield f"{self.name}_sum{labels} {_format_number(total)}"
+        yield f"{self.name}_count{labels} {count}"
+
+
+class Registry:
+    """Named metrics of one process."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics: Dict[str, _Metric] = {}
+
+    def _register(self, cls, name, documentation, labelnames, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, documentation, labelnames, **kwargs)
+            elif not isinstance(metric, cls) or metric.labelnames != tuple(labelnames):
+                raise ValueError(f"Metric {name} is already registered with another type or labels")
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Counter:
+        """Get or create a counter."""
+        return self._register(Counter, name, documentation, labelnames)
+
+    def histogram(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                  buckets: Tuple[float, ...] = LATENCY_BUCKETS) -> Histogram:
+        """Get or create a histogram."""
+        return self._register(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format."""
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda metric: metric.name)
+        return "".join(metric.render() + "\n" for metric in metrics)
+
+
+REGISTRY = Registry()
+counter = REGISTRY.counter
+histogram = REGISTRY.histogram
+render = REGISTRY.render
+
+# Metrics recorded by both services
+LLM_LATENCY = histogram(
+    "llm_request_seconds", "Latency of upstream LLM calls",
+    ("service", "model", "outcome"))
+LLM_PROMPT_TOKENS = histogram(
+    "llm_prompt_tokens", "Prompt tokens per upstream LLM call",
+    ("service", "model"), TOKEN_BUCKETS)
+LLM_RESPONSE_TOKENS = histogram(
+    "llm_response_tokens", "Response tokens per upstream LLM call",
+    ("service", "model"), TOKEN_BUCKETS)
+LLM_ERRORS = counter(
+    "llm_errors_total", "Upstream LLM calls that raised",
+    ("service", "model"))
+LLM_BUDGET_RETRIES = counter(
+    "llm_budget_retries_total", "Calls repeated with the full output cap after hitting their adaptive budget",
+    ("service", "model"))
+LLM_STOP_RETRIES = counter(
+    "llm_stop_retries_total", "Calls repeated without stop sequences because the stop cut the reply before its code",
+    ("service", "model"))
+CODE_EXTRACTION = histogram(
+    "code_extraction_seconds", "Time to extract code from an LLM response",
+    ("service",), FAST_BUCKETS)
+CODEBLEU_STAGE = histogram(
+    "codebleu_stage_seconds", "Time per CodeBLEU evaluation stage",
+    ("stage",), FAST_BUCKETS)
+CACHE_REQUESTS = counter(
+    "cache_requests_total", "Response cache lookups by result (hit, miss, coalesced)",
+    ("cache", "result"))
+ERRORS = counter(
+    "errors_total", "Requests that failed and were reported as an error payload",
+    ("service", "operation"))
+
+
+@contextmanager
+def track_llm_call(service: str, model: str):
+    """Time an upstream LLM call and count it as an error if the block raises."""
+    start = perf_counter()
+    try:
+        yield
+    except BaseException:
+        LLM_LATENCY.observe(perf_counter() - start, service=service, model=model, outcome="error")
+        LLM_ERRORS.inc(service=service, model=model)
+        raise
+    LLM_LATENCY.observe(perf_counter() - start, service=service, model=model, outcome="ok")
+
+
+def record_tokens(service: str, model: str, prompt_tokens: Optional[int],
+                  response_tokens: Optional[int]):
+    """Record token usage reported by the API (None when it wasn't reported)."""
+    if prompt_tokens is not None:
+        LLM_PROMPT_TOKENS.observe(prompt_tokens, service=service, model=model)
+    if response_tokens is not None:
+        LLM_RESPONSE_TOKENS.observe(response_tokens, service=service, model=model)